@@ -1,3 +1,4 @@
+import sys
 import argparse
 from src.command_parser import parse_commands
 from src.base_utils import setup_logger
@@ -5,7 +6,7 @@ from src.base_utils import setup_logger
 logger = setup_logger("main", "logs/master.log")
 
 
-def main() -> None:
+def main() -> int:
     try:
         logger.info("Starting the static site generator.")
 
@@ -16,12 +17,14 @@ def main() -> None:
 
         if hasattr(args, "func") and callable(args.func):
             logger.info(f"Executing command: {args.command}")
-            args.func(args)
+            return args.func(args) or 0
         else:
             parser.print_help()
     except Exception as err:
         logger.error(f"An unexpected error occurred: {err}", exc_info=True)
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
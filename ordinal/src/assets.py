@@ -0,0 +1,102 @@
+import os
+import re
+import json
+import hashlib
+from src.base_utils import Site, default_site, setup_logger, write_if_changed, cache_dir
+from src.bulk_io import queue_copy, queue_write
+
+logger = setup_logger("assets", "logs/assets.log")
+
+ASSET_CACHE_FILE = "assets.json"
+FINGERPRINT_LENGTH = 10
+STYLESHEET = "styles/main.css"
+
+fingerprinted_pattern = re.compile(rf"\.[0-9a-f]{{{FINGERPRINT_LENGTH}}}(\.[^./]+)$")
+
+
+def fingerprint_name(rel_fp: str, digest: str) -> str:
+    """`images/hm2024.jpg` -> `images/hm2024.<hash>.jpg`"""
+    stem, extension = os.path.splitext(rel_fp)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def load_asset_cache(cache_dir: str = cache_dir) -> dict:
+    cache_fp = os.path.join(cache_dir, ASSET_CACHE_FILE)
+    try:
+        with open(cache_fp, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        entries = {}
+    except Exception as err:
+        logger.error(f"Error loading asset cache {cache_fp}: {err}")
+        entries = {}
+    return {"entries": entries, "used": {}}
+
+
+def save_asset_cache(cache: dict, cache_dir: str = cache_dir) -> None:
+    cache_fp = os.path.join(cache_dir, ASSET_CACHE_FILE)
+    try:
+        write_if_changed(cache_fp, json.dumps(cache["used"], indent=1, sort_keys=True))
+    except Exception as err:
+        logger.error(f"Error saving asset cache {cache_fp}: {err}")
+
+
+def file_digest_cached(fp: str, cache: dict) -> str:
+    """Hashes `fp`, reusing the cached digest while its size and mtime are unchanged."""
+    stat = os.stat(fp)
+    entry = cache["entries"].get(fp)
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        digest = entry[2]
+    else:
+        with open(fp, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    cache["used"][fp] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest
+
+
+def collect_assets(site: Site = default_site, stylesheet: str = None, writer=None) -> dict:
+    """Writes fingerprinted copies of the stylesheet and images; returns `{path: fingerprinted path}`."""
+    assets = {}
+    cache = load_asset_cache(site.cache_dir)
+
+    try:
+        if stylesheet is not None:
+            digest = hashlib.sha256(stylesheet.encode("utf-8")).hexdigest()
+            assets[STYLESHEET] = fingerprint_name(STYLESHEET, digest)
+            css_fp = os.path.join(site.public_dir, assets[STYLESHEET])
+            queue_write(writer, css_fp, stylesheet, f"Wrote fingerprinted stylesheet: {css_fp}")
+
+        sources = {}
+        for images_dir in (os.path.join(site.static_dir, "images"), os.path.join(site.content_dir, "images")):
+            for root, _, files in os.walk(images_dir):
+                for file in sorted(files):
+                    src_fp = os.path.join(root, file)
+                    rel_fp = os.path.relpath(src_fp, images_dir).replace(os.sep, "/")
+                    sources[f"images/{rel_fp}"] = src_fp
+
+        for rel_fp, src_fp in sorted(sources.items()):
+            assets[rel_fp] = fingerprint_name(rel_fp, file_digest_cached(src_fp, cache))
+            dest_fp = os.path.join(site.public_dir, assets[rel_fp])
+            queue_copy(writer, src_fp, dest_fp, f"Copied fingerprinted image: {src_fp} -> {dest_fp}")
+
+        save_asset_cache(cache, site.cache_dir)
+        logger.info(f"Fingerprinted {len(assets)} asset(s) for {site.root}")
+    except Exception as err:
+        logger.error(f"Error fingerprinting assets: {err}", exc_info=True)
+
+    return assets
+
+
+def prune_assets(assets: dict, public_dir: str) -> None:
+    """Removes fingerprinted files left over from earlier builds."""
+    current = {os.path.join(public_dir, path) for item in assets.items() for path in item}
+    try:
+        for directory in ("styles", "images"):
+            for root, _, files in os.walk(os.path.join(public_dir, directory)):
+                for file in files:
+                    fp = os.path.join(root, file)
+                    if fingerprinted_pattern.search(file) and fp not in current:
+                        os.remove(fp)
+                        logger.info(f"Removed stale fingerprinted asset: {fp}")
+    except Exception as err:
+        logger.error(f"Error pruning fingerprinted assets: {err}")
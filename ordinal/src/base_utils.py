@@ -1,22 +1,32 @@
 import os
+import shutil
 import logging
-from jinja2 import Environment, FileSystemLoader
+import tempfile
+from dataclasses import dataclass
 
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 content_dir = os.path.join(base_dir, "content")
 templates_dir = os.path.join(base_dir, "src", "templates")
+static_dir = os.path.join(base_dir, "src", "static")
 public_dir = os.path.join(base_dir, "public")
 snapshots_dir = os.path.join(base_dir, "snapshots")
+cache_dir = os.path.join(base_dir, ".cache")
 logs_dir = os.path.join(base_dir, "logs")
+site_url = "https://al3f.com"
 os.makedirs(logs_dir, exist_ok=True)
 
+TEMPORARY_SUFFIX = ".tmp"
+# Temporary files are created private; outputs get the mode a plain open() would give.
+umask = os.umask(0)
+os.umask(umask)
+
 
 def setup_logger(name: str, log_file: str, level=logging.INFO) -> logging.Logger:
     os.makedirs(os.path.dirname(log_file), exist_ok=True)
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    file_handler = logging.FileHandler(log_file)
+    file_handler = logging.FileHandler(log_file, delay=True)
     file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
 
     console_handler = logging.StreamHandler()
@@ -31,7 +41,46 @@ def setup_logger(name: str, log_file: str, level=logging.INFO) -> logging.Logger
 
 logger = setup_logger("base_utils", os.path.join(logs_dir, "base_utils.log"))
 
-env = Environment(loader=FileSystemLoader(templates_dir))
+
+@dataclass(frozen=True)
+class Site:
+    """The directories and public URL of one wiki."""
+
+    root: str
+    content_dir: str
+    templates_dir: str
+    static_dir: str
+    public_dir: str
+    cache_dir: str
+    url: str
+
+    @classmethod
+    def from_root(cls, root: str, default_url: str = "") -> "Site":
+        """Builds a Site from `root` and its optional `site.yaml`; only `default_site` may omit `url`."""
+        root = os.path.abspath(root)
+        config = {}
+        config_fp = os.path.join(root, "site.yaml")
+        if os.path.isfile(config_fp):
+            import yaml
+
+            with open(config_fp, "r", encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+
+        def directory(key: str, *default: str) -> str:
+            return os.path.join(root, config.get(key, os.path.join(*default)))
+
+        return cls(
+            root=root,
+            content_dir=directory("content_dir", "content"),
+            templates_dir=directory("templates_dir", "src", "templates"),
+            static_dir=directory("static_dir", "src", "static"),
+            public_dir=directory("public_dir", "public"),
+            cache_dir=directory("cache_dir", ".cache"),
+            url=str(config.get("url", default_url)).rstrip("/"),
+        )
+
+
+default_site = Site.from_root(base_dir, site_url)
 
 
 def ensure_directory(path: str) -> None:
@@ -39,3 +88,67 @@ def ensure_directory(path: str) -> None:
         os.makedirs(path, exist_ok=True)
     except Exception as err:
         logger.error(f"Error ensuring directory {path}: {err}")
+
+
+def open_temporary(path: str, mode: str):
+    directory = os.path.dirname(path)
+    options = {"mode": mode, "dir": directory, "prefix": f".{os.path.basename(path)}.", "suffix": TEMPORARY_SUFFIX}
+    if "b" not in mode:
+        options["encoding"] = "utf-8"
+    try:
+        return tempfile.NamedTemporaryFile(delete=False, **options)
+    except FileNotFoundError:
+        ensure_directory(directory)
+        return tempfile.NamedTemporaryFile(delete=False, **options)
+
+
+def is_temporary(file: str) -> bool:
+    return file.startswith(".") and file.endswith(TEMPORARY_SUFFIX)
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Atomically writes `content` to `path` unless it already holds it; returns True when written."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+
+    tmp = open_temporary(path, "w")
+    replaced = False
+    try:
+        with tmp:
+            tmp.write(content)
+        os.chmod(tmp.name, 0o666 & ~umask)
+        os.replace(tmp.name, path)
+        replaced = True
+    finally:
+        if not replaced:
+            os.remove(tmp.name)
+    return True
+
+
+def copy_if_changed(src: str, dest: str) -> bool:
+    """Atomically copies `src` to `dest` unless size and mtime already match; returns True when copied."""
+    try:
+        src_stat = os.stat(src)
+        dest_stat = os.stat(dest)
+        if src_stat.st_size == dest_stat.st_size and src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+            return False
+    except FileNotFoundError:
+        pass
+
+    with open(src, "rb") as source:
+        tmp = open_temporary(dest, "wb")
+        replaced = False
+        try:
+            with tmp:
+                shutil.copyfileobj(source, tmp)
+            shutil.copystat(src, tmp.name)
+            os.replace(tmp.name, dest)
+            replaced = True
+        finally:
+            if not replaced:
+                os.remove(tmp.name)
+    return True
@@ -0,0 +1,99 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Iterable, Optional
+from src.base_utils import setup_logger, ensure_directory, write_if_changed, copy_if_changed
+
+logger = setup_logger("bulk_io", "logs/bulk_io.log")
+
+IO_WORKERS = 16
+MAX_PENDING = 256
+
+
+def open_writer(directories: Iterable[str] = (), max_workers: int = IO_WORKERS) -> dict:
+    """Opens a pooled writer that creates `directories` up front."""
+    writer = {
+        "executor": ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-io"),
+        "slots": threading.BoundedSemaphore(MAX_PENDING),
+        "lock": threading.Lock(),
+        "directories": set(),
+        "latest": {},
+        "pending": [],
+        "failures": [],
+    }
+    prepare_directories(writer, directories)
+    return writer
+
+
+def prepare_directories(writer: dict, directories: Iterable[str]) -> None:
+    for directory in sorted({os.path.abspath(directory) for directory in directories} - writer["directories"]):
+        ensure_directory(directory)
+        writer["directories"].add(directory)
+
+
+def submit(writer: dict, path: str, function: Callable, *args, message: Optional[str] = None) -> Future:
+    """Queues `function(*args)` after any earlier operation on the same `path`."""
+    path = os.path.abspath(path)
+    with writer["lock"]:
+        prepare_directories(writer, [os.path.dirname(path)])
+        previous = writer["latest"].get(path)
+
+    def run():
+        if previous is not None:
+            # Earlier futures were queued first, so waiting on one can't starve the pool.
+            previous.exception()
+        return function(*args)
+
+    writer["slots"].acquire()
+    future = writer["executor"].submit(run)
+    future.add_done_callback(lambda _: writer["slots"].release())
+
+    with writer["lock"]:
+        writer["latest"][path] = future
+        writer["pending"].append((path, message, future))
+    return future
+
+
+def queue_write(writer: Optional[dict], path: str, content: str, message: Optional[str] = None) -> None:
+    if writer is None:
+        if write_if_changed(path, content) and message:
+            logger.info(message)
+        return
+    submit(writer, path, write_if_changed, path, content, message=message)
+
+
+def queue_copy(writer: Optional[dict], src: str, dest: str, message: Optional[str] = None) -> None:
+    if writer is None:
+        if copy_if_changed(src, dest) and message:
+            logger.info(message)
+        return
+    submit(writer, dest, copy_if_changed, src, dest, message=message)
+
+
+def flush_writer(writer: dict) -> list:
+    """Waits for queued operations; failures are logged and kept in `writer["failures"]`."""
+    with writer["lock"]:
+        pending, writer["pending"] = writer["pending"], []
+        writer["latest"] = {}
+
+    results = []
+    for path, message, future in pending:
+        try:
+            result = future.result()
+            if result and message:
+                logger.info(message)
+        except Exception as err:
+            logger.error(f"Error writing {path}: {err}")
+            writer["failures"].append({"page": path, "error": str(err)})
+            result = None
+        results.append(result)
+
+    logger.info(f"Flushed {len(results)} queued write(s).")
+    return results
+
+
+def close_writer(writer: dict) -> list:
+    try:
+        return flush_writer(writer)
+    finally:
+        writer["executor"].shutdown()
@@ -1,37 +1,186 @@
-from src.file_manager import setup_project, cleanup_orphans, get_categories
-from src.html_renderer import generate_static_site
-from src.snapshot_manager import manage_snapshots
-from src.base_utils import setup_logger
+import os
+from src.base_utils import Site, default_site, setup_logger
 
 logger = setup_logger("command_parser", "logs/command_parser.log")
 
 
+# Command implementations are imported inside their handlers so that `--help` and
+# lightweight subcommands don't pay for the renderer, parser and template imports.
+
+
+def run_setup(args) -> None:
+    from src.file_manager import setup_project
+
+    setup_project()
+
+
+def get_sites(args) -> list[Site]:
+    if not args.site:
+        return [default_site]
+    # The same root twice would have two threads building into one staging directory.
+    roots = dict.fromkeys(os.path.abspath(root) for root in args.site)
+    return [default_site if root == default_site.root else Site.from_root(root) for root in roots]
+
+
+def run_generate(args) -> int:
+    from src.file_manager import get_categories
+
+    sites = get_sites(args)
+
+    for site in sites:
+        if not site.url:
+            # Otherwise the sitemap and feeds would publish URLs of another site.
+            args.parser.error(f"argument --site: {site.root} needs a `url` in its site.yaml")
+
+    if args.category != "all":
+        for site in sites:
+            categories = get_categories(site.content_dir)
+            if args.category not in categories:
+                choices = ", ".join(repr(choice) for choice in categories + ["all"])
+                args.parser.error(f"argument --category: invalid choice: {args.category!r} (choose from {choices})")
+
+    from src.html_renderer import generate_sites
+
+    failures = generate_sites(
+        sites,
+        args.category,
+        placeholders=args.generate_missing,
+        precompress=args.precompress,
+        minify=args.minify,
+        debug_dump=args.debug_dump,
+    )
+
+    if not failures:
+        return 0
+
+    print(f"{len(failures)} failure(s):")
+    for failure in failures:
+        print(f"  {failure['page'] or 'build'}: {failure['error']}")
+    return 1
+
+
+def run_cleanup(args) -> None:
+    from src.file_manager import cleanup_orphans
+
+    cleanup_orphans()
+
+
+def run_snapshot(args) -> int:
+    if args.action == "diff" and not args.snapshot:
+        args.parser.error("argument --snapshot: required for --action diff")
+    if args.glob and not args.snapshot:
+        args.parser.error("argument --glob: requires --snapshot")
+
+    from src.snapshot_manager import manage_snapshots
+
+    return manage_snapshots(args.action, args.category, args.snapshot, args.to, args.glob)
+
+
+def run_check(args) -> int:
+    from src.link_checker import run_checks
+
+    return max(run_checks(site) for site in get_sites(args))
+
+
+def run_graph(args) -> int:
+    from src.link_graph import run_graph as analyse_graph
+
+    return max(analyse_graph(site, args.output, args.hubs, args.path) for site in get_sites(args))
+
+
+def run_search(args) -> None:
+    from src.search_index import search
+
+    sites = get_sites(args)
+    found = False
+    for site in sites:
+        # With several sites, prefix each result with its site's URL to tell them apart.
+        prefix = site.url if len(sites) > 1 else ""
+        for result in search(args.query, site.public_dir, limit=args.limit):
+            print(f"{result['title']} - {prefix}{result['url']}")
+            found = True
+
+    if not found:
+        print("No matches found.")
+
+
 def parse_commands(parser):
     logger.info("Setting up commands.")
 
-    categories = get_categories()
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
 
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     setup_parser = subparsers.add_parser("setup", help="Set up project directories.")
-    setup_parser.set_defaults(func=lambda args: setup_project())
+    setup_parser.set_defaults(func=run_setup)
 
     generate_parser = subparsers.add_parser("generate", help="Generate static site.")
     generate_parser.add_argument(
-        "--category", choices=categories + ["all"], default="all", help="Category to generate."
+        "--category", default="all", help="Category to generate (a content category or `all`)."
+    )
+    generate_parser.add_argument(
+        "--generate-missing",
+        action="store_true",
+        help="Create placeholder pages from `template.md` for unresolved wikilinks.",
+    )
+    generate_parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write .gz (and .br when brotli is installed) next to changed HTML, CSS, SVG and XML output.",
+    )
+    generate_parser.add_argument(
+        "--minify", action="store_true", help="Collapse HTML whitespace and compile compressed CSS."
+    )
+    generate_parser.add_argument(
+        "--debug-dump",
+        action="store_true",
+        help="Write each page's frontmatter, sections, TOC and backlinks to logs/debug_dump.jsonl (rotated).",
     )
-    generate_parser.set_defaults(func=lambda args: generate_static_site(args.category))
+    generate_parser.add_argument(
+        "--site",
+        action="append",
+        metavar="ROOT",
+        help="Root directory of a site to build. Repeat to build several sites concurrently.",
+    )
+    generate_parser.set_defaults(func=run_generate, parser=generate_parser)
 
     cleanup_parser = subparsers.add_parser("cleanup", help="Remove orphaned files.")
-    cleanup_parser.set_defaults(func=lambda args: cleanup_orphans())
+    cleanup_parser.set_defaults(func=run_cleanup)
 
     snapshot_parser = subparsers.add_parser("snapshot", help="Manage snapshots.")
     snapshot_parser.add_argument(
         "--action",
-        choices=["create", "restore", "delete"],
+        choices=["create", "restore", "delete", "diff"],
         required=True,
         help="Action to perform.",
     )
     snapshot_parser.add_argument("--category", type=str, help="Category for snapshots.")
-    snapshot_parser.set_defaults(func=lambda args: manage_snapshots(args.action, args.category))
+    snapshot_parser.add_argument(
+        "--snapshot", metavar="ID", help="Snapshot to restore or diff from, e.g. 20250130_114956."
+    )
+    snapshot_parser.add_argument("--to", metavar="ID", help="Snapshot to diff against instead of the public directory.")
+    snapshot_parser.add_argument("--glob", metavar="PATTERN", help="Only diff or restore files matching this pattern.")
+    snapshot_parser.set_defaults(func=run_snapshot, parser=snapshot_parser)
+
+    check_parser = subparsers.add_parser(
+        "check", help="Report broken wikilinks, missing images, duplicate slugs and undefined footnotes."
+    )
+    check_parser.add_argument("--site", action="append", metavar="ROOT", help="Root directory of a site to check.")
+    check_parser.set_defaults(func=run_check)
+
+    graph_parser = subparsers.add_parser(
+        "graph", help="Export the wikilink graph and report orphans, hubs and strongly connected components."
+    )
+    graph_parser.add_argument("--output", metavar="FILE", help="Where to write the JSON Lines graph.")
+    graph_parser.add_argument("--hubs", type=int, default=10, help="Number of most-linked pages to list.")
+    graph_parser.add_argument(
+        "--path", nargs=2, metavar=("FROM", "TO"), help="Print the shortest link path between two pages."
+    )
+    graph_parser.add_argument("--site", action="append", metavar="ROOT", help="Root directory of a site to analyse.")
+    graph_parser.set_defaults(func=run_graph)
+
+    search_parser = subparsers.add_parser("search", help="Search the generated site index.")
+    search_parser.add_argument("query", help='Words to search for. Wrap in double quotes to match a phrase.')
+    search_parser.add_argument("--limit", type=int, default=10, help="Maximum number of results per site.")
+    search_parser.add_argument("--site", action="append", metavar="ROOT", help="Root directory of a site to search.")
+    search_parser.set_defaults(func=run_search)
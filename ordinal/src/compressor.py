@@ -0,0 +1,117 @@
+import os
+import gzip
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from src.base_utils import setup_logger, write_if_changed, open_temporary, umask, cache_dir, public_dir
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = setup_logger("compressor", "logs/compressor.log")
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".svg", ".xml")
+PRECOMPRESS_MANIFEST_FILE = "precompress.json"
+
+
+def load_manifest(manifest_fp: str) -> dict:
+    try:
+        with open(manifest_fp, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as err:
+        logger.error(f"Error loading precompression manifest {manifest_fp}: {err}")
+        return {}
+
+
+def write_compressed(fp: str, data: bytes) -> None:
+    tmp = open_temporary(fp, "wb")
+    replaced = False
+    try:
+        with tmp:
+            tmp.write(data)
+        os.chmod(tmp.name, 0o666 & ~umask)
+        os.replace(tmp.name, fp)
+        replaced = True
+    finally:
+        if not replaced:
+            os.remove(tmp.name)
+
+
+def compress_file(fp: str) -> None:
+    with open(fp, "rb") as f:
+        data = f.read()
+
+    # mtime=0 keeps the output byte-identical across builds for identical input.
+    write_compressed(f"{fp}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_compressed(f"{fp}.br", brotli.compress(data, quality=11))
+
+
+def is_compressed_output(file: str) -> bool:
+    return file.endswith((".gz", ".br")) and file[:-3].endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def remove_compressed(public_dir: str = public_dir) -> None:
+    """Deletes `.gz`/`.br` files left by an earlier `--precompress` build, which would otherwise go stale."""
+    removed = 0
+    try:
+        for root, _, files in os.walk(public_dir):
+            for file in files:
+                if is_compressed_output(file):
+                    os.remove(os.path.join(root, file))
+                    removed += 1
+        if removed:
+            logger.info(f"Removed {removed} precompressed file(s) from a build without --precompress.")
+    except Exception as err:
+        logger.error(f"Error removing precompressed files: {err}")
+
+
+def precompress_site(public_dir: str = public_dir, cache_dir: str = cache_dir) -> None:
+    """Writes `.gz`/`.br` next to compressible outputs whose content changed since the last run."""
+    manifest_fp = os.path.join(cache_dir, PRECOMPRESS_MANIFEST_FILE)
+    try:
+        manifest = load_manifest(manifest_fp)
+        current = {}
+        pending = []
+
+        for root, _, files in os.walk(public_dir):
+            for file in files:
+                fp = os.path.join(root, file)
+
+                if is_compressed_output(file):
+                    if not os.path.exists(fp[:-3]):
+                        os.remove(fp)
+                        logger.info(f"Removed stale compressed file: {fp}")
+                    continue
+
+                if not file.endswith(COMPRESSIBLE_EXTENSIONS):
+                    continue
+
+                rel_fp = os.path.relpath(fp, public_dir)
+                stat = os.stat(fp)
+                entry = manifest.get(rel_fp)
+                if isinstance(entry, list) and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                    digest = entry[2]
+                else:
+                    with open(fp, "rb") as f:
+                        digest = hashlib.sha256(f.read()).hexdigest()
+                current[rel_fp] = [stat.st_size, stat.st_mtime_ns, digest]
+
+                outputs_present = os.path.exists(f"{fp}.gz") and (brotli is None or os.path.exists(f"{fp}.br"))
+                if not isinstance(entry, list) or entry[2] != digest or not outputs_present:
+                    pending.append(fp)
+
+        with ThreadPoolExecutor() as executor:
+            for fp, _ in zip(pending, executor.map(compress_file, pending)):
+                logger.info(f"Precompressed: {fp}")
+
+        write_if_changed(manifest_fp, json.dumps(current, indent=0, sort_keys=True))
+
+        formats = "gzip and brotli" if brotli is not None else "gzip"
+        logger.info(f"Precompressed {len(pending)} of {len(current)} file(s) with {formats}.")
+    except Exception as err:
+        logger.error(f"Error precompressing site: {err}", exc_info=True)
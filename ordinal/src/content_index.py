@@ -0,0 +1,190 @@
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Optional
+from collections import defaultdict
+from src.base_utils import setup_logger, content_dir
+from src.markdown_parser import parse_frontmatter, read_frontmatter
+from src.text_utils import slugify, unique_anchor
+
+logger = setup_logger("content_index", "logs/content_index.log")
+
+LISTING_PAGE_SIZE = 50
+SECTION_PREVIEW = 10
+DEFAULT_DOMAIN = "Miscellaneous"
+LISTING_DIRS = ("all", "domains")
+
+unsafe_path_pattern = re.compile(r"[^\w.-]+")
+timestamp_pattern = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?)?")
+
+
+def timestamp_key(value) -> int:
+    """`2025-01-30 11:49:56` -> `20250130114956`; missing or invalid values give 0."""
+    match = timestamp_pattern.match(str(value or ""))
+    if not match:
+        return 0
+    return int("".join(part or "00" for part in match.groups()))
+
+
+def format_timestamp(key: int) -> str:
+    if not key:
+        return "Unknown"
+    text = str(key)
+    date = f"{text[0:4]}-{text[4:6]}-{text[6:8]}"
+    if key % 1000000 == 0:
+        return date
+    return f"{date} {text[8:10]}:{text[10:12]}:{text[12:14]}"
+
+
+def timestamp_datetime(key: int) -> Optional[datetime]:
+    if not key:
+        return None
+    return datetime.strptime(str(key), "%Y%m%d%H%M%S")
+
+
+def intern_strings(value) -> tuple:
+    if isinstance(value, str):
+        value = [value]
+    elif not isinstance(value, list):
+        return ()
+    return tuple(sys.intern(item) for item in value if isinstance(item, str))
+
+
+class PageRecord:
+    """Compact, interned metadata of one page."""
+
+    __slots__ = (
+        "id",
+        "slug",
+        "name",
+        "category",
+        "path",
+        "url",
+        "title",
+        "description",
+        "domain",
+        "domains",
+        "division",
+        "created",
+        "last_modified",
+        "template",
+        "content",
+    )
+
+    def __init__(self, page_id: int, md_fp: str, category: str, frontmatter: dict, content: Optional[str]):
+        self.id = page_id
+        self.name = os.path.splitext(os.path.basename(md_fp))[0]
+        self.slug = slugify(self.name)
+        self.category = sys.intern(category)
+        self.path = md_fp
+        self.url = f"/{category}/{self.name}.html" if category else f"/{self.name}.html"
+        self.title = str(frontmatter.get("title", self.name.replace("-", " ").title()))
+        self.description = str(frontmatter.get("description", ""))
+        domain = frontmatter.get("domain")
+        self.domain = sys.intern(domain) if isinstance(domain, str) else ""
+        self.domains = tuple(sys.intern(name.lower()) for name in intern_strings(domain))
+        self.division = intern_strings(frontmatter.get("division", []))
+        self.created = timestamp_key(frontmatter.get("created"))
+        self.last_modified = timestamp_key(frontmatter.get("last_modified")) or self.created
+        self.template = frontmatter.get("template")
+        self.content = content
+
+    @property
+    def created_text(self) -> str:
+        return format_timestamp(self.created)
+
+    @property
+    def last_modified_text(self) -> str:
+        return format_timestamp(self.last_modified)
+
+    def __repr__(self) -> str:
+        # Render keys hash the context through repr(), so include every listed field.
+        return (
+            f"PageRecord({self.url!r}, {self.title!r}, {self.description!r}, {self.domain!r}, "
+            f"{self.division!r}, {self.created}, {self.last_modified})"
+        )
+
+
+def build_content_index(content_dir: str = content_dir, with_content: bool = False) -> dict:
+    """Indexes every Markdown file under `content_dir`, keeping bodies only `with_content`."""
+    pages = []
+    by_slug = defaultdict(list)
+    by_domain = defaultdict(list)
+
+    try:
+        for root, dirs, files in os.walk(content_dir):
+            dirs.sort()
+            for file in sorted(files):
+                if not file.endswith(".md"):
+                    continue
+
+                md_fp = os.path.join(root, file)
+                rel_dir = os.path.relpath(root, content_dir)
+                category = "" if rel_dir == "." else rel_dir.split(os.sep)[0]
+                parsed_data = parse_frontmatter(md_fp) if with_content else read_frontmatter(md_fp)
+
+                page = PageRecord(
+                    len(pages),
+                    md_fp,
+                    category,
+                    parsed_data.get("frontmatter") or {},
+                    parsed_data.get("content", "") if with_content else None,
+                )
+                pages.append(page)
+                by_slug[page.slug].append(page)
+                for domain in page.domains:
+                    by_domain[domain].append(page)
+
+        logger.info(f"Indexed {len(pages)} page(s) from {content_dir}")
+    except Exception as err:
+        logger.error(f"Error building content index: {err}", exc_info=True)
+
+    return {
+        "content_dir": content_dir,
+        "pages": pages,
+        "by_slug": dict(by_slug),
+        "by_domain": dict(by_domain),
+        "listings": {},
+    }
+
+
+def page_id(page: PageRecord, content_dir: str) -> str:
+    """`content/articles/unity.md` -> `articles/unity`, unique even when slugs repeat."""
+    return os.path.splitext(os.path.relpath(page.path, content_dir))[0].replace(os.sep, "/")
+
+
+def get_category_pages(index: dict, category: str, include_section: bool = True) -> list[PageRecord]:
+    return [
+        page for page in index["pages"] if page.category == category and (include_section or page.slug != category)
+    ]
+
+
+def get_domain_listing(index: dict, category: str) -> dict[str, list[PageRecord]]:
+    """Memoized `{domain: pages}` of a category, newest first."""
+    listings = index.setdefault("listings", {})
+    if category not in listings:
+        by_domain = defaultdict(list)
+        for page in get_category_pages(index, category):
+            by_domain[page.domain or DEFAULT_DOMAIN].append(page)
+        listings[category] = {
+            domain: sorted(pages, key=lambda x: x.last_modified, reverse=True)
+            for domain, pages in sorted(by_domain.items())
+        }
+    return listings[category]
+
+
+def get_domain_slugs(index: dict, category: str) -> dict[str, str]:
+    """Memoized, collision-free directory names for a category's domain listings."""
+    domain_slugs = index.setdefault("domain_slugs", {})
+    if category not in domain_slugs:
+        seen = set()
+        domain_slugs[category] = {
+            domain: unique_anchor(unsafe_path_pattern.sub("-", slugify(domain)).strip("-.") or "domain", seen)
+            for domain in get_domain_listing(index, category)
+        }
+    return domain_slugs[category]
+
+
+def paginate(items: list, page_size: int = LISTING_PAGE_SIZE) -> list[list]:
+    return [items[start:start + page_size] for start in range(0, len(items), page_size)] or [[]]
@@ -0,0 +1,36 @@
+import os
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+from src.base_utils import logs_dir
+
+DEBUG_DUMP_FILE = "debug_dump.jsonl"
+DEBUG_DUMP_MAX_BYTES = 5 * 1024 * 1024
+DEBUG_DUMP_BACKUPS = 3
+
+
+def open_debug_dump(logs_dir: str = logs_dir) -> logging.Logger:
+    dump = logging.getLogger("debug_dump")
+    if not dump.handlers:
+        handler = RotatingFileHandler(
+            os.path.join(logs_dir, DEBUG_DUMP_FILE),
+            maxBytes=DEBUG_DUMP_MAX_BYTES,
+            backupCount=DEBUG_DUMP_BACKUPS,
+            encoding="utf-8",
+            delay=True,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        dump.addHandler(handler)
+        dump.setLevel(logging.DEBUG)
+        dump.propagate = False
+    return dump
+
+
+def dump_page(dump: Optional[logging.Logger], md_fp: str, artifacts: dict) -> None:
+    if dump is None:
+        return
+    try:
+        dump.debug(json.dumps({"page": md_fp, **artifacts}, default=str, ensure_ascii=False))
+    except Exception as err:
+        dump.debug(json.dumps({"page": md_fp, "error": f"Could not serialize debug dump: {err}"}))
@@ -0,0 +1,79 @@
+import os
+from xml.sax.saxutils import escape
+from src.base_utils import setup_logger, public_dir, site_url
+from src.bulk_io import queue_write
+from src.content_index import PageRecord, get_category_pages, timestamp_datetime
+
+logger = setup_logger("feeds", "logs/feeds.log")
+
+FEED_ENTRIES = 20
+ATOM_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def render_sitemap(index: dict, site_url: str = site_url) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+
+    for page in sorted(index["pages"], key=lambda x: x.url):
+        lines.append("  <url>")
+        lines.append(f"    <loc>{escape(site_url + page.url)}</loc>")
+        if page.last_modified:
+            lines.append(f"    <lastmod>{timestamp_datetime(page.last_modified).strftime('%Y-%m-%d')}</lastmod>")
+        lines.append("  </url>")
+
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_feed(category: str, pages: list[PageRecord], site_url: str = site_url) -> str:
+    dated = sorted((page for page in pages if page.created), key=lambda x: x.created, reverse=True)[:FEED_ENTRIES]
+
+    feed_url = f"{site_url}/{category}/feed.xml"
+    updated = max((page.last_modified for page in dated), default=19700101000000)
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(category.title())}</title>",
+        f"  <id>{escape(feed_url)}</id>",
+        f'  <link rel="self" href="{escape(feed_url)}"/>',
+        f'  <link href="{escape(site_url)}/{escape(category)}/{escape(category)}.html"/>',
+        f"  <updated>{timestamp_datetime(updated).strftime(ATOM_TIME_FORMAT)}</updated>",
+    ]
+
+    for page in dated:
+        page_url = site_url + page.url
+        lines.extend(
+            [
+                "  <entry>",
+                f"    <title>{escape(page.title)}</title>",
+                f"    <id>{escape(page_url)}</id>",
+                f'    <link href="{escape(page_url)}"/>',
+                f"    <published>{timestamp_datetime(page.created).strftime(ATOM_TIME_FORMAT)}</published>",
+                f"    <updated>{timestamp_datetime(page.last_modified).strftime(ATOM_TIME_FORMAT)}</updated>",
+                f"    <summary>{escape(page.description)}</summary>",
+                "  </entry>",
+            ]
+        )
+
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def generate_feeds(index: dict, public_dir: str = public_dir, site_url: str = site_url, writer=None) -> None:
+    """Writes `sitemap.xml` and a `feed.xml` per category."""
+    try:
+        sitemap_fp = os.path.join(public_dir, "sitemap.xml")
+        queue_write(writer, sitemap_fp, render_sitemap(index, site_url), f"Wrote sitemap: {sitemap_fp}")
+
+        categories = sorted({page.category for page in index["pages"] if page.category})
+        for category in categories:
+            feed_fp = os.path.join(public_dir, category, "feed.xml")
+            pages = get_category_pages(index, category, include_section=False)
+            if not pages:
+                continue
+            queue_write(writer, feed_fp, render_feed(category, pages, site_url), f"Wrote feed: {feed_fp}")
+    except Exception as err:
+        logger.error(f"Error generating sitemap and feeds: {err}", exc_info=True)
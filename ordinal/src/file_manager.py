@@ -1,23 +1,31 @@
 import os
-import re
 from datetime import datetime
-import shutil
 from src.base_utils import (
     ensure_directory,
+    write_if_changed,
     setup_logger,
     content_dir,
     templates_dir,
     public_dir,
     snapshots_dir,
 )
-
-from src.markdown_parser import parse_frontmatter
+from src.bulk_io import queue_copy
+
+from src.content_index import (
+    LISTING_DIRS,
+    SECTION_PREVIEW,
+    PageRecord,
+    build_content_index,
+    format_timestamp,
+    get_category_pages,
+)
+from src.text_utils import slugify, frontmatter_pattern, last_modified_pattern, wikilink_pattern
 
 logger = setup_logger("file_manager", "logs/file_manager.log")
 logs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs")
 
 
-def get_categories() -> list[str]:
+def get_categories(content_dir: str = content_dir) -> list[str]:
     try:
         logger.info("Fetching categories from content directory.")
         if not os.path.exists(content_dir):
@@ -67,80 +75,82 @@ def setup_project() -> None:
         logger.error(f"Unexpected error in setup_project: {err}")
 
 
-def generate_section() -> None:
-    try:
-        logger.info("Regenerating section markdown files.")
+def section_body(category: str, articles: list[PageRecord]) -> str:
+    body = f"""# {category.title()}
 
-        categories = get_categories()
+## Latest Articles
+"""
 
-        for category in categories:
-            section_md_fp = os.path.join(content_dir, category, f"{category}.md")
+    for article in articles[:5]:
+        body += f"- [[{article.title}]] - {article.created_text}\n"
 
-            articles = []
-            for root, _, files in os.walk(os.path.join(content_dir, category)):
-                for file in files:
-                    if file.endswith(".md") and file != f"{category}.md":
-                        md_fp = os.path.join(root, file)
-                        with open(md_fp, "r", encoding="utf-8") as f:
-                            frontmatter_data = parse_frontmatter(md_fp)
-                            frontmatter = frontmatter_data.get("frontmatter", {})
-                            title = frontmatter.get("title", file.replace(".md", ""))
-                            created = frontmatter.get("created", "Unknown")
-                            domain = frontmatter.get("domain", "Uncategorized")
-
-                            wikilink = f"[[{title}]]"
-
-                            articles.append(
-                                {
-                                    "title": title,
-                                    "wikilink": wikilink,
-                                    "created": created,
-                                    "domain": domain,
-                                    "url": f"/{category}/{file.replace('.md', '.html')}",
-                                }
-                            )
-
-            articles.sort(key=lambda x: x["created"], reverse=True)
-
-            articles_by_domain = {}
-            for article in articles:
-                domain = article["domain"]
-                if domain not in articles_by_domain:
-                    articles_by_domain[domain] = []
-                articles_by_domain[domain].append(article)
-
-            new_content = f"""---
-title: {category.title()}
-description: "This section contains all {category}."
-created: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-last_modified: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
----
+    articles_by_domain = {}
+    for article in articles:
+        articles_by_domain.setdefault(article.domain or "Uncategorized", []).append(article)
 
-# {category.title()}
+    # The full per-domain listings are the paginated pages under `<category>/domains/`.
+    body += "\n## Articles by Domain\n"
+    for domain, domain_articles in articles_by_domain.items():
+        body += f"\n### {domain.title()}\n"
+        for article in domain_articles[:SECTION_PREVIEW]:
+            body += f"- [[{article.title}]]\n"
+        if len(domain_articles) > SECTION_PREVIEW:
+            body += f"- ...and {len(domain_articles) - SECTION_PREVIEW} more\n"
 
-## Latest Articles
-"""
+    return body
 
-            for article in articles[:5]:
-                new_content += f"- {article['wikilink']} - {article['created']}\n"
 
-            new_content += "\n## All Articles by Domain\n"
-            for domain, domain_articles in articles_by_domain.items():
-                new_content += f"\n### {domain.title()}\n"
-                for article in domain_articles:
-                    new_content += f"- {article['wikilink']}\n"
+def generate_section(index: dict = None, content_dir: str = content_dir) -> None:
+    """Rewrites each category's section markdown only when its listing changed."""
+    try:
+        logger.info("Regenerating section markdown files.")
+
+        if index is None:
+            index = build_content_index(content_dir)
+
+        for category in get_categories(content_dir):
+            section_md_fp = os.path.join(content_dir, category, f"{category}.md")
 
-            with open(section_md_fp, "w", encoding="utf-8") as f:
-                f.write(new_content)
+            articles = [page for page in get_category_pages(index, category) if page.path != section_md_fp]
+            articles.sort(key=lambda x: (x.created, x.url), reverse=True)
+            body = section_body(category, articles)
+
+            timestamps = sorted(
+                stamp for article in articles for stamp in (article.created, article.last_modified) if stamp
+            )
+            last_modified = format_timestamp(timestamps[-1] if timestamps else 0)
+
+            existing = None
+            if os.path.exists(section_md_fp):
+                with open(section_md_fp, "r", encoding="utf-8") as f:
+                    existing = frontmatter_pattern.match(f.read())
+
+            if existing:
+                if existing.group(2).strip() == body.strip():
+                    logger.info(f"Section markdown unchanged: {section_md_fp}")
+                    continue
+
+                frontmatter_text = existing.group(1)
+                if last_modified_pattern.search(frontmatter_text):
+                    frontmatter_text = last_modified_pattern.sub(f"last_modified: {last_modified}", frontmatter_text)
+                else:
+                    frontmatter_text += f"\nlast_modified: {last_modified}"
+            else:
+                frontmatter_text = f"""title: {category.title()}
+description: "This section contains all {category}."
+created: {format_timestamp(timestamps[0] if timestamps else 0)}
+last_modified: {last_modified}"""
 
-            logger.info(f"Updated section markdown: {section_md_fp}")
+            if write_if_changed(section_md_fp, f"---\n{frontmatter_text}\n---\n\n{body}"):
+                logger.info(f"Updated section markdown: {section_md_fp}")
 
     except Exception as err:
         logger.error(f"Error regenerating section markdown files: {err}", exc_info=True)
 
 
-def generate_missing() -> None:
-    template_fp = os.path.join(content_dir, "../src/templates/template.md")
+def generate_missing(index: dict = None, content_dir: str = content_dir, templates_dir: str = templates_dir) -> None:
+    """Creates placeholder pages for unresolved wikilinks; `index` must be built `with_content`."""
+    template_fp = os.path.join(templates_dir, "template.md")
 
     try:
         if not os.path.exists(template_fp):
@@ -150,45 +160,41 @@ def generate_missing() -> None:
         with open(template_fp, "r", encoding="utf-8") as template_file:
             template_content = template_file.read()
 
-        for root, _, files in os.walk(content_dir):
-            for file in files:
-                if file.endswith(".md"):
-                    md_fp = os.path.join(root, file)
-                    with open(md_fp, "r", encoding="utf-8") as f:
-                        markdown_content = f.read()
+        if index is None:
+            index = build_content_index(content_dir, with_content=True)
+        known_slugs = set(index["by_slug"])
 
-                    pattern = r"\[\[(.*?)\]\]"
-                    wikilinks = re.findall(pattern, markdown_content)
+        for page in index["pages"]:
+            for link in wikilink_pattern.findall(page.content):
+                slug = slugify(link)
 
-                    for link in wikilinks:
-                        slug = link.replace(" ", "-").lower()
-                        filename = f"{slug}.md"
+                if slug in known_slugs:
+                    logger.info(f"File already exists for wikilink: {link}")
+                    continue
 
-                        file_found = False
-                        for content_root, _, content_files in os.walk(content_dir):
-                            if filename in content_files:
-                                file_found = True
-                                break
+                category = page.category or "articles"
+                category_dir = os.path.join(content_dir, category)
+                ensure_directory(category_dir)
 
-                        if not file_found:
-                            category = os.path.basename(root) if root != content_dir else "articles"
-                            category_dir = os.path.join(content_dir, category)
-                            ensure_directory(category_dir)
+                filepath = os.path.join(category_dir, f"{slug}.md")
 
-                            filepath = os.path.join(category_dir, filename)
+                # Stamp placeholders with the linking page's time instead of the clock, so
+                # regenerating a deleted placeholder reproduces the same file.
+                if page.last_modified:
+                    timestamp = page.last_modified_text
+                else:
+                    timestamp = datetime.fromtimestamp(os.path.getmtime(page.path)).strftime("%Y-%m-%d %H:%M:%S")
 
-                            frontmatter = template_content.format(
-                                title=link.title(),
-                                created=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                last_modified=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            )
+                frontmatter = template_content.format(
+                    title=link.title(),
+                    created=timestamp,
+                    last_modified=timestamp,
+                )
 
-                            with open(filepath, "w", encoding="utf-8") as new_file:
-                                new_file.write(frontmatter)
+                write_if_changed(filepath, frontmatter)
 
-                            logger.info(f"Created missing file: {filepath}")
-                        else:
-                            logger.info(f"File already exists for wikilink: {link}")
+                known_slugs.add(slug)
+                logger.info(f"Created missing file: {filepath}")
 
     except Exception as err:
         logger.error(f"Error during generate_missing: {err}", exc_info=True)
@@ -208,7 +214,11 @@ def cleanup_orphans() -> None:
             if file.endswith(".md")
         }
 
-        for root, _, files in os.walk(public_dir):
+        for root, dirs, files in os.walk(public_dir):
+            # Listing pages under `<category>/all/` and `<category>/domains/` have no Markdown source.
+            rel_root = os.path.relpath(root, public_dir)
+            if rel_root != "." and os.sep not in rel_root:
+                dirs[:] = [directory for directory in dirs if directory not in LISTING_DIRS]
             for file in files:
                 if file.endswith(".html"):
                     html_basename = os.path.splitext(file)[0]
@@ -220,7 +230,7 @@ def cleanup_orphans() -> None:
         logger.error(f"Error during cleanup of orphaned HTML files: {err}")
 
 
-def merge_image_dir() -> None:
+def merge_image_dir(content_dir: str = content_dir, public_dir: str = public_dir, writer=None) -> None:
     source_dir = os.path.join(content_dir, "images")
     dest_dir = os.path.join(public_dir, "images")
 
@@ -228,19 +238,12 @@ def merge_image_dir() -> None:
         logger.info(f"Source images directory does not exist: {source_dir}. Skipping.")
         return
 
-    ensure_directory(dest_dir)
-
     try:
         for root, dirs, files in os.walk(source_dir):
             for file in files:
                 source_file = os.path.join(root, file)
                 rel_path = os.path.relpath(source_file, source_dir)
                 destination_file = os.path.join(dest_dir, rel_path)
-
-                destination_dir_path = os.path.dirname(destination_file)
-                ensure_directory(destination_dir_path)
-
-                shutil.copy2(source_file, destination_file)
-                logger.info(f"Copied image: {source_file} -> {destination_file}")
+                queue_copy(writer, source_file, destination_file, f"Copied image: {source_file} -> {destination_file}")
     except Exception as err:
         logger.error(f"Error merging images directory: {err}")
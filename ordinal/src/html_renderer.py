@@ -1,93 +1,259 @@
 import os
-import shutil
-from src.base_utils import content_dir, public_dir, setup_logger, ensure_directory
+import hashlib
+from dataclasses import replace
+from src.base_utils import Site, default_site, setup_logger, write_if_changed
+from src.bulk_io import open_writer, close_writer, submit, queue_write, queue_copy
+from src.staging import recover_public, prepare_staging, swap_in
+from src.snapshot_manager import matches_current
 from src.file_manager import get_categories, generate_missing, merge_image_dir
 from src.markdown_parser import parse_frontmatter, parse_related, parse_footnotes, parse_articles
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+from src.compressor import precompress_site, remove_compressed
+from src.content_index import (
+    LISTING_DIRS,
+    LISTING_PAGE_SIZE,
+    SECTION_PREVIEW,
+    build_content_index,
+    get_domain_listing,
+    get_domain_slugs,
+    paginate,
+)
+from src.feeds import generate_feeds
+from src.debug_dump import open_debug_dump, dump_page
+from src.assets import collect_assets, prune_assets
+from src.minifier import load_minify_cache, minify_cached, save_minify_cache
+from src.search_index import load_search_cache, update_search_entry, write_search_index
+from src.template_loader import (
+    get_environment,
+    template_dependencies,
+    load_render_manifest,
+    render_key,
+    is_up_to_date,
+    save_render_manifest,
+    open_render_journal,
+    record_render,
+    close_render_journal,
+)
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
-from collections import defaultdict
+from typing import Optional
 
 
 logger = setup_logger("html_renderer", "logs/html_renderer.log")
 
-env = Environment(loader=FileSystemLoader("src/templates"))
 
-
-def compile_scss():
+def compile_scss(minify=False, site: Site = default_site, writer=None) -> Optional[str]:
+    """Compiles `main.scss`; returns None when sass failed."""
     try:
-        scss_path = "src/static/styles/main.scss"
-        css_output = os.path.join(public_dir, "styles", "main.css")
-        ensure_directory(os.path.dirname(css_output))
-        subprocess.run(["sass", scss_path, css_output], check=True)
-        logger.info(f"Compiled SCSS: {scss_path} -> {css_output}")
+        scss_path = os.path.join(site.static_dir, "styles", "main.scss")
+        css_output = os.path.join(site.public_dir, "styles", "main.css")
+        style = "compressed" if minify else "expanded"
+        # Compile to stdout so an unchanged stylesheet leaves main.css untouched.
+        result = subprocess.run(
+            ["sass", f"--style={style}", "--no-source-map", scss_path],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        queue_write(writer, css_output, result.stdout, f"Compiled SCSS: {scss_path} -> {css_output}")
+        return result.stdout
     except Exception as err:
         logger.error(f"Error compiling SCSS: {err}")
+    return None
 
 
-def copy_static_files():
+def copy_static_files(site: Site = default_site, writer=None):
     try:
-        static_src = os.path.join("src", "static")
-        static_dest = os.path.join(public_dir)
-        ensure_directory(static_dest)
+        static_src = site.static_dir
+        static_dest = site.public_dir
 
         for root, _, files in os.walk(static_src):
             for file in files:
                 src_fp = os.path.join(root, file)
                 rel_fp = os.path.relpath(src_fp, static_src)
                 dest_fp = os.path.join(static_dest, rel_fp)
-                ensure_directory(os.path.dirname(dest_fp))
-                shutil.copy2(src_fp, dest_fp)
-                logger.info(f"Copied static file: {src_fp} -> {dest_fp}")
+                queue_copy(writer, src_fp, dest_fp, f"Copied static file: {src_fp} -> {dest_fp}")
     except Exception as err:
         logger.error(f"Error copying static files: {err}")
 
 
-def render_template_context(template_name: str, context: dict) -> str:
-    try:
-        template = env.get_template(template_name)
-        return template.render(**context)
-    except TemplateNotFound as err:
-        logger.error(f"Template not found: {err}")
-    except Exception as err:
-        logger.error(f"Error rendering template {template_name}: {err}")
-    return ""
+def listing_url(category: str, name: str, number: int) -> str:
+    return f"/{category}/{name}/{number}.html"
 
 
-def get_articles_list() -> dict:
-    articles_dir = os.path.join(content_dir, "articles")
-    categorized_articles = defaultdict(list)
+def get_articles_list(index: dict, category: str = "articles") -> dict:
+    domain_slugs = get_domain_slugs(index, category)
+    return {
+        domain: {
+            "articles": pages[:SECTION_PREVIEW],
+            "count": len(pages),
+            "url": listing_url(category, f"domains/{domain_slugs[domain]}", 1),
+        }
+        for domain, pages in get_domain_listing(index, category).items()
+    }
 
-    if os.path.exists(articles_dir):
-        for file in os.listdir(articles_dir):
-            if file.endswith(".md"):
-                md_fp = os.path.join(articles_dir, file)
-                parsed_data = parse_frontmatter(md_fp)
-                frontmatter = parsed_data.get("frontmatter", {})
 
-                title = frontmatter.get("title", file.replace(".md", "").replace("-", " ").title())
-                last_modified = frontmatter.get("last_modified", "Unknown")
-                domain = frontmatter.get("domain", "Miscellaneous")
-                division = frontmatter.get("division", [])
-                url = f"/articles/{file.replace('.md', '.html')}"
+def output_directories(site: Site, categories: list[str]) -> set[str]:
+    directories = {site.public_dir, os.path.join(site.public_dir, "styles")}
+    directories.update(os.path.join(site.public_dir, category) for category in categories)
+    for source_dir, dest_dir in (
+        (site.static_dir, site.public_dir),
+        (os.path.join(site.content_dir, "images"), os.path.join(site.public_dir, "images")),
+    ):
+        for root, _, _ in os.walk(source_dir):
+            directories.add(os.path.join(dest_dir, os.path.relpath(root, source_dir)))
+    return directories
 
-                categorized_articles[domain].append(
-                    {"title": title, "url": url, "last_modified": last_modified, "domain": domain, "division": division}
-                )
 
+def new_build(site: Site = default_site, minify: bool = False, debug_dump: bool = False) -> dict:
+    """State shared by every page of one build."""
     return {
-        domain: sorted(articles, key=lambda x: x["last_modified"], reverse=True)
-        for domain, articles in sorted(categorized_articles.items())
+        "site": site,
+        "env": get_environment(site.templates_dir),
+        "backlinks": {},
+        "search_cache": load_search_cache(site.cache_dir),
+        "minify_cache": load_minify_cache(site.cache_dir) if minify else None,
+        "render_manifest": load_render_manifest(site.cache_dir),
+        "writer": None,
+        "journal": None,
+        "assets": {},
+        "debug_dump": open_debug_dump() if debug_dump else None,
+        "failures": [],
     }
 
 
-def process_file(md_fp: str, output_fp: str, default_template: str, backlinks: dict) -> None:
+def record_failure(build: dict, page: str, err: Exception) -> None:
+    logger.error(f"Error processing {page}: {err}")
+    build["failures"].append({"page": page, "error": str(err)})
+
+
+def write_output(output_fp: str, html: str, journal: Optional[dict], output_key: str, key: Optional[dict]) -> bool:
+    changed = write_if_changed(output_fp, html)
+    if key is not None:
+        stat = os.stat(output_fp)
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        key["output"] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if journal is not None:
+            record_render(journal, output_key, key)
+    return changed
+
+
+def finish_writes(build: dict) -> None:
+    """Flushes and shuts down the build's writer, recording each failed write."""
+    writer, build["writer"] = build["writer"], None
+    close_writer(writer)
+    for failure in writer["failures"]:
+        output_key = os.path.relpath(failure["page"], build["site"].public_dir)
+        # The old file is still in place, so it mustn't be recorded as up to date.
+        build["render_manifest"].pop(output_key, None)
+        build["failures"].append({"page": output_key, "error": failure["error"]})
+
+
+def render_output(
+    output_fp: str, template_name: str, context: dict, build: dict, used_assets: Optional[dict] = None
+) -> None:
+    """Renders `context` into `output_fp` unless the render manifest shows it is current."""
+    site = build["site"]
+    minify_cache = build["minify_cache"]
+    render_manifest = build["render_manifest"]
+    output_key = os.path.relpath(output_fp, site.public_dir)
+
+    key = None
+    if render_manifest is not None:
+        dependencies = template_dependencies(build["env"], template_name)
+        key = render_key(template_name, dependencies, context, {"minify": minify_cache is not None})
+
+    entry = render_manifest.get(output_key) if key is not None else None
+    if (
+        key is not None
+        and is_up_to_date(entry, key, build["assets"])
+        and matches_current(site.public_dir, output_key, entry["output"])
+    ):
+        logger.info(f"Up to date: {output_fp} (template and context unchanged)")
+        return
+
+    # Template errors propagate, so a broken page is reported instead of written empty.
+    used_assets = dict(used_assets or {})
+    template = build["env"].get_template(template_name)
+    rendered_html = template.render({**context, "assets": build["assets"], "used_assets": used_assets})
+    if key is not None:
+        key["assets"] = used_assets
+    if minify_cache is not None:
+        rendered_html = minify_cached(rendered_html, minify_cache)
+    # logger.info(f"Rendering template with context:\n{json.dumps(context, indent=4)}")
+    message = f"Generated: {output_fp} using template {template_name}"
+    if build["writer"] is None:
+        write_output(output_fp, rendered_html, build["journal"], output_key, key)
+    else:
+        arguments = (output_fp, rendered_html, build["journal"], output_key, key)
+        submit(build["writer"], output_fp, write_output, *arguments, message=message)
+
+    if key is not None:
+        render_manifest[output_key] = key
+
+
+def process_listings(category: str, build: dict) -> None:
+    """Writes the paginated `all/` and `domains/<slug>/` listing pages of a category."""
+    try:
+        site = build["site"]
+        listing = get_domain_listing(build["index"], category)
+        domain_slugs = get_domain_slugs(build["index"], category)
+        domains = [
+            {"name": domain, "url": listing_url(category, f"domains/{domain_slugs[domain]}", 1)} for domain in listing
+        ]
+        everything = sorted(
+            (page for pages in listing.values() for page in pages), key=lambda x: x.last_modified, reverse=True
+        )
+
+        listings = [("all", f"All {category.title()}", everything)]
+        listings.extend((f"domains/{domain_slugs[domain]}", domain, pages) for domain, pages in listing.items())
+
+        outputs = set()
+        for name, title, pages in listings:
+            slices = paginate(pages, LISTING_PAGE_SIZE)
+            for number, entries in enumerate(slices, start=1):
+                url = listing_url(category, name, number)
+                output_fp = os.path.join(site.public_dir, *url.strip("/").split("/"))
+                outputs.add(output_fp)
+                context = {
+                    "title": title,
+                    "description": f"{len(pages)} entries, page {number} of {len(slices)}.",
+                    "root": "../" * (url.count("/") - 1),
+                    "section_url": f"/{category}/{category}.html",
+                    "entries": entries,
+                    "domains": domains,
+                    "page": number,
+                    "pages": len(slices),
+                    "previous_url": listing_url(category, name, number - 1) if number > 1 else None,
+                    "next_url": listing_url(category, name, number + 1) if number < len(slices) else None,
+                }
+                try:
+                    render_output(output_fp, "listing.html", context, build)
+                except Exception as err:
+                    # Keep going, so one bad page doesn't cost the category its other listings.
+                    record_failure(build, url.lstrip("/"), err)
+
+        for listing_dir in LISTING_DIRS:
+            for root, _, files in os.walk(os.path.join(site.public_dir, category, listing_dir), topdown=False):
+                for file in files:
+                    fp = os.path.join(root, file)
+                    if file.endswith(".html") and fp not in outputs:
+                        os.remove(fp)
+                        logger.info(f"Removed stale listing page: {fp}")
+                # Directories of current listings may still be waiting on queued writes.
+                if not os.listdir(root) and not any(fp.startswith(root + os.sep) for fp in outputs):
+                    os.rmdir(root)
+    except Exception as err:
+        record_failure(build, f"{category} listings", err)
+
+
+def process_file(md_fp: str, output_fp: str, default_template: str, build: dict) -> None:
     try:
         logger.info(f"Processing file: {md_fp}")
 
-        if os.path.exists(output_fp):
-            os.remove(output_fp)
-            logger.info(f"Deleted old file: {output_fp}")
+        site = build["site"]
+        backlinks = build["backlinks"]
 
+        # Parsed again rather than kept from the index, so only one page's body is in memory at a time.
         parsed_data = parse_frontmatter(md_fp)
         frontmatter = parsed_data.get("frontmatter", {})
         raw_content = parsed_data.get("content", "")
@@ -96,10 +262,13 @@ def process_file(md_fp: str, output_fp: str, default_template: str, backlinks: d
         footnotes_content, footnotes = parse_footnotes(raw_content)
 
         logger.info("Parsing articles.")
-        articles = parse_articles(footnotes_content, os.path.basename(md_fp), backlinks)
+        used_assets = {}
+        articles = parse_articles(
+            footnotes_content, os.path.basename(md_fp), backlinks, site.content_dir, build["assets"], used_assets
+        )
 
         logger.info("Looking for related articles.")
-        related = parse_related(frontmatter)
+        related = parse_related(frontmatter, site.content_dir, build.get("index"))
 
         template_name = frontmatter.get("template", default_template)
         logger.info(f"Using template: {template_name} for {md_fp}")
@@ -129,53 +298,142 @@ def process_file(md_fp: str, output_fp: str, default_template: str, backlinks: d
             "related_articles": related,
         }
 
-        if template_name == "section.html":
-            context["categorized_articles"] = get_articles_list()
-
-        rendered_html = render_template_context(template_name, context)
-        ensure_directory(os.path.dirname(output_fp))
-        # logger.info(f"Rendering template with context:\n{json.dumps(context, indent=4)}")
-        with open(output_fp, "w", encoding="utf-8") as f:
-            f.write(rendered_html)
+        output_key = os.path.relpath(output_fp, site.public_dir)
+        category = os.path.dirname(output_key).split(os.sep)[0]
 
-        logger.info(f"Generated: {output_fp} using template {template_name}")
+        if template_name == "section.html":
+            context["categorized_articles"] = get_articles_list(build["index"], category or "articles")
+            context["all_url"] = listing_url(category, "all", 1) if category else None
+        dump_page(
+            build["debug_dump"],
+            md_fp,
+            {
+                "output": output_key,
+                "template": template_name,
+                "frontmatter": frontmatter,
+                "articles": context["articles"],
+                "toc": context["toc"],
+                "footnotes": footnotes,
+                "backlinks": context["backlinks"],
+                "related_articles": related,
+            },
+        )
+        render_output(output_fp, template_name, context, build, used_assets)
+
+        if template_name == "section.html" and category:
+            process_listings(category, build)
+
+        update_search_entry(
+            build["search_cache"],
+            os.path.relpath(md_fp, site.content_dir),
+            "/" + output_key.replace(os.sep, "/"),
+            context["title"],
+            context["articles"],
+        )
     except Exception as err:
-        logger.error(f"Error processing file {md_fp}: {err}")
+        record_failure(build, os.path.relpath(md_fp, build["site"].content_dir), err)
 
 
-def generate_static_site(category="all"):
+def generate_static_site(
+    category="all", placeholders=False, precompress=False, minify=False, site=default_site, debug_dump=False
+) -> list[dict]:
+    """Builds `site` in a staging directory, swaps it in, and returns the failed pages."""
+    failures = []
+    build = None
     try:
-        logger.info("Starting site generation.")
-        categories = get_categories()
-        backlinks = {}
+        logger.info(f"Starting site generation for {site.root}.")
+        recover_public(site.public_dir)
+        staging_dir, resumed = prepare_staging(site.public_dir)
+        public_dir = site.public_dir
+        site = replace(site, public_dir=staging_dir)
+
+        categories = get_categories(site.content_dir)
+        build = new_build(site, minify, debug_dump)
+        failures = build["failures"]
+        build["journal"] = open_render_journal(build["render_manifest"], resumed, site.cache_dir)
+        build["writer"] = writer = open_writer(output_directories(site, categories))
+
+        # Assets are fingerprinted before any page renders, so pages link the hashed names.
+        stylesheet = compile_scss(minify, site, writer)
+        build["assets"] = collect_assets(site, stylesheet, writer)
+
+        index = build_content_index(site.content_dir, with_content=placeholders)
 
-        logger.info("Checking and generating missing markdown files.")
-        generate_missing()
+        if placeholders:
+            logger.info("Checking and generating missing markdown files.")
+            generate_missing(index, site.content_dir, site.templates_dir)
+            index = build_content_index(site.content_dir)
+        build["index"] = index
 
-        process_index(content_dir, public_dir, backlinks)
+        process_index(build)
 
         if category == "all":
             for cat in categories:
-                process_category(cat, content_dir, public_dir, backlinks)
+                process_category(cat, build)
         else:
             if category in categories:
-                process_category(category, content_dir, public_dir, backlinks)
+                process_category(category, build)
             else:
                 logger.error(f"Invalid category: {category}")
+
+        logger.info("Writing sitemap and feeds.")
+        generate_feeds(index, site.public_dir, site.url, writer)
+
+        logger.info("Writing search index.")
+        write_search_index(build["search_cache"], site.content_dir, site.public_dir, site.cache_dir, writer)
+
         logger.info("Copying all necessary static files.")
-        copy_static_files()
-        merge_image_dir()
-        compile_scss()
+        copy_static_files(site, writer)
+        merge_image_dir(site.content_dir, site.public_dir, writer)
 
-    except Exception as err:
-        logger.error(f"Error generating static site: {err}", exc_info=True)
+        logger.info("Flushing queued writes.")
+        finish_writes(build)
+        prune_assets(build["assets"], site.public_dir)
+
+        if build["minify_cache"] is not None:
+            save_minify_cache(build["minify_cache"], site.cache_dir)
+        save_render_manifest(build["render_manifest"], site.public_dir, site.cache_dir)
 
+        if precompress:
+            logger.info("Precompressing changed output files.")
+            precompress_site(site.public_dir, site.cache_dir)
+        else:
+            remove_compressed(site.public_dir)
 
-def process_category(category: str, content_dir: str, public_dir: str, backlinks: dict) -> None:
+        swap_in(staging_dir, public_dir)
+        close_render_journal(build["journal"], remove=True)
+    except Exception as err:
+        logger.error(f"Error generating static site: {err}", exc_info=True)
+        failures.append({"page": None, "error": f"Build stopped before swapping in: {err}"})
+        if build is not None:
+            # Let queued writes land and reach the journal, so the next build can resume from them.
+            if build["writer"] is not None:
+                finish_writes(build)
+            if build["journal"] is not None:
+                close_render_journal(build["journal"])
+
+    if failures:
+        logger.error(f"{len(failures)} failure(s) while building {site.root}.")
+    return failures
+
+
+def generate_sites(
+    sites: list[Site], category="all", placeholders=False, precompress=False, minify=False, debug_dump=False
+):
+    with ThreadPoolExecutor(max_workers=len(sites) or 1) as executor:
+        futures = [
+            executor.submit(generate_static_site, category, placeholders, precompress, minify, site, debug_dump)
+            for site in sites
+        ]
+        return [failure for future in futures for failure in future.result()]
+
+
+def process_category(category: str, build: dict) -> None:
     try:
         logger.info(f"Processing category: {category}")
-        category_dir = os.path.join(content_dir, category)
-        output_dir = os.path.join(public_dir, category)
+        site = build["site"]
+        category_dir = os.path.join(site.content_dir, category)
+        output_dir = os.path.join(site.public_dir, category)
 
         if not os.path.isdir(category_dir):
             logger.error(f"Category directory `{category_dir}` does not exist.")
@@ -187,22 +445,23 @@ def process_category(category: str, content_dir: str, public_dir: str, backlinks
                 output_fp = os.path.join(output_dir, file.replace(".md", ".html"))
 
                 default_template = f"{category}.html"
-                process_file(md_fp, output_fp, default_template, backlinks)
+                process_file(md_fp, output_fp, default_template, build)
     except Exception as err:
-        logger.error(f"Error processing category `{category}`: {err}", exc_info=True)
+        record_failure(build, category, err)
 
 
-def process_index(content_dir: str, public_dir: str, backlinks: dict) -> None:
+def process_index(build: dict) -> None:
     try:
         logger.info("Processing `index.md`.")
-        index_md_fp = os.path.join(content_dir, "index.md")
-        index_output_fp = os.path.join(public_dir, "index.html")
+        site = build["site"]
+        index_md_fp = os.path.join(site.content_dir, "index.md")
+        index_output_fp = os.path.join(site.public_dir, "index.html")
 
         if not os.path.exists(index_md_fp):
             logger.error(f"`index.md` file does not exist at: {index_md_fp}")
             return
 
-        process_file(index_md_fp, index_output_fp, "index.html", backlinks)
+        process_file(index_md_fp, index_output_fp, "index.html", build)
         logger.info(f"Processed `index.md` into {index_output_fp}")
     except Exception as err:
-        logger.error(f"Error processing `index.md`: {err}")
+        record_failure(build, "index.md", err)
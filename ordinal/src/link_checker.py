@@ -0,0 +1,63 @@
+import os
+from src.base_utils import Site, default_site, setup_logger
+from src.content_index import build_content_index, page_id
+from src.markdown_parser import VALID_IMAGE_EXTENSIONS, resolve_wikilink
+from src.text_utils import wikilink_pattern, image_pattern, footnote_pattern, footnote_ref_pattern
+
+logger = setup_logger("link_checker", "logs/link_checker.log")
+
+
+def get_image_names(index: dict, static_dir: str) -> set[str]:
+    image_names = set()
+    for images_dir in [os.path.join(index["content_dir"], "images"), os.path.join(static_dir, "images")]:
+        for _, _, files in os.walk(images_dir):
+            image_names.update(files)
+    return image_names
+
+
+def check_content(index: dict, static_dir: str = default_site.static_dir) -> list[dict]:
+    problems = []
+    image_names = get_image_names(index, static_dir)
+    page_ids = {page_id(page, index["content_dir"]) for page in index["pages"]}
+
+    for page in index["pages"]:
+        rel_fp = os.path.relpath(page.path, index["content_dir"])
+
+        for link_text in wikilink_pattern.findall(page.content):
+            if resolve_wikilink(link_text, index["content_dir"], page_ids) is None:
+                problems.append({"kind": "unresolved-wikilink", "page": rel_fp, "detail": f"[[{link_text}]]"})
+
+        for _, src in image_pattern.findall(page.content):
+            if src.lower().endswith(VALID_IMAGE_EXTENSIONS) and os.path.basename(src) not in image_names:
+                problems.append({"kind": "missing-image", "page": rel_fp, "detail": src})
+
+        definitions = {ref_id for ref_id, _ in footnote_pattern.findall(page.content)}
+        for ref_id in sorted(set(footnote_ref_pattern.findall(footnote_pattern.sub("", page.content)))):
+            if ref_id not in definitions:
+                problems.append({"kind": "undefined-footnote", "page": rel_fp, "detail": f"[^{ref_id}]"})
+
+    for slug, pages in index["by_slug"].items():
+        if len(pages) > 1:
+            paths = ", ".join(os.path.relpath(page.path, index["content_dir"]) for page in pages)
+            problems.append({"kind": "duplicate-slug", "page": slug, "detail": paths})
+
+    return problems
+
+
+def run_checks(site: Site = default_site) -> int:
+    """Prints every problem found and returns the exit code."""
+    try:
+        problems = check_content(build_content_index(site.content_dir, with_content=True), site.static_dir)
+    except Exception as err:
+        logger.error(f"Error checking content: {err}", exc_info=True)
+        return 1
+
+    for problem in problems:
+        print(f"{problem['kind']}: {problem['page']}: {problem['detail']}")
+
+    if problems:
+        print(f"{len(problems)} problem(s) found.")
+        return 1
+
+    print("No problems found.")
+    return 0
@@ -0,0 +1,199 @@
+import os
+import json
+from collections import deque
+from typing import Optional
+from src.base_utils import Site, default_site, setup_logger, write_if_changed
+from src.content_index import build_content_index, page_id
+from src.markdown_parser import resolve_wikilink
+from src.text_utils import slugify, wikilink_pattern
+
+logger = setup_logger("link_graph", "logs/link_graph.log")
+
+GRAPH_FILE = "graph.jsonl"
+
+
+def build_link_graph(index: dict) -> dict:
+    """Builds the wikilink graph, keyed by page id, from an index built `with_content`."""
+    nodes = {page_id(page, index["content_dir"]): page for page in index["pages"]}
+    edges = {}
+    unresolved = {}
+
+    for slug, pages in index["by_slug"].items():
+        if len(pages) > 1:
+            paths = ", ".join(page_id(page, index["content_dir"]) for page in pages)
+            logger.warning(f"Duplicate slug `{slug}`: {paths}; links resolve to only one of them.")
+
+    for node, page in nodes.items():
+        targets = {}
+        for link_text in wikilink_pattern.findall(page.content or ""):
+            folder = resolve_wikilink(link_text, index["content_dir"], nodes)
+            if folder is not None:
+                targets[f"{folder}/{slugify(link_text)}"] = None
+            else:
+                unresolved.setdefault(node, []).append(link_text)
+        edges[node] = list(targets)
+
+    return {"nodes": nodes, "edges": edges, "unresolved": unresolved}
+
+
+def find_node(graph: dict, name: str) -> str:
+    """Accepts a node id such as `articles/unity`, or a page name as written in a wikilink."""
+    if name in graph["nodes"]:
+        return name
+    folder = resolve_wikilink(name, pages=graph["nodes"])
+    return f"{folder}/{slugify(name)}" if folder else slugify(name)
+
+
+def in_degrees(graph: dict) -> dict:
+    degrees = dict.fromkeys(graph["nodes"], 0)
+    for targets in graph["edges"].values():
+        for target in targets:
+            degrees[target] += 1
+    return degrees
+
+
+def find_orphans(graph: dict, degrees: dict, roots: tuple = ("index",)) -> list[str]:
+    """Pages nothing links to, other than the entry points in `roots`."""
+    return sorted(slug for slug, degree in degrees.items() if degree == 0 and slug not in roots)
+
+
+def find_hubs(graph: dict, degrees: dict, limit: int = 10) -> list[tuple]:
+    """The `limit` pages with the most inbound links, as `(slug, inbound, outbound)`."""
+    ranked = sorted(graph["nodes"], key=lambda slug: (-degrees[slug], -len(graph["edges"][slug]), slug))
+    return [(slug, degrees[slug], len(graph["edges"][slug])) for slug in ranked[:limit]]
+
+
+def strongly_connected_components(graph: dict) -> list[list[str]]:
+    """Iterative Tarjan's algorithm; components largest first."""
+    edges = graph["edges"]
+    order = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in graph["nodes"]:
+        if root in order:
+            continue
+        work = [(root, iter(edges[root]))]
+        order[root] = lowlink[root] = len(order)
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, targets = work[-1]
+            for target in targets:
+                if target not in order:
+                    order[target] = lowlink[target] = len(order)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges[target])))
+                    break
+                if target in on_stack:
+                    lowlink[node] = min(lowlink[node], order[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+
+    return sorted(components, key=lambda component: (-len(component), component))
+
+
+def shortest_path(graph: dict, source: str, target: str) -> Optional[list[str]]:
+    """Breadth-first search along link direction; None when `target` isn't reachable."""
+    if source not in graph["nodes"] or target not in graph["nodes"]:
+        return None
+
+    previous = {source: None}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        if node == target:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = previous[node]
+            return path[::-1]
+        for neighbour in graph["edges"][node]:
+            if neighbour not in previous:
+                previous[neighbour] = node
+                queue.append(neighbour)
+    return None
+
+
+def serialize_graph(graph: dict, degrees: dict) -> str:
+    """Writes the graph as JSON Lines: node records, then edge records."""
+    lines = []
+    for node, page in sorted(graph["nodes"].items()):
+        record = {
+            "type": "node",
+            "id": node,
+            "slug": page.slug,
+            "title": page.title,
+            "url": page.url,
+            "category": page.category,
+            "domain": page.domain,
+            "division": list(page.division),
+            "created": page.created_text,
+            "last_modified": page.last_modified_text,
+            "in": degrees[node],
+            "out": len(graph["edges"][node]),
+        }
+        if node in graph["unresolved"]:
+            record["unresolved"] = graph["unresolved"][node]
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+    for source in sorted(graph["edges"]):
+        for target in graph["edges"][source]:
+            lines.append(json.dumps({"type": "edge", "source": source, "target": target}, separators=(",", ":")))
+
+    return "\n".join(lines) + "\n"
+
+
+def run_graph(
+    site: Site = default_site, output: Optional[str] = None, hubs: int = 10, path: Optional[tuple] = None
+) -> int:
+    try:
+        graph = build_link_graph(build_content_index(site.content_dir, with_content=True))
+        degrees = in_degrees(graph)
+
+        output = output or os.path.join(site.cache_dir, GRAPH_FILE)
+        edge_count = sum(len(targets) for targets in graph["edges"].values())
+        write_if_changed(output, serialize_graph(graph, degrees))
+        print(f"Wrote {len(graph['nodes'])} node(s) and {edge_count} edge(s) to {output}")
+
+        orphans = find_orphans(graph, degrees)
+        print(f"\nOrphans ({len(orphans)}):")
+        for slug in orphans:
+            print(f"  {slug}")
+
+        print("\nHubs (inbound, outbound):")
+        for slug, inbound, outbound in find_hubs(graph, degrees, hubs):
+            print(f"  {slug} ({inbound}, {outbound})")
+
+        components = [component for component in strongly_connected_components(graph) if len(component) > 1]
+        print(f"\nStrongly connected components ({len(components)}):")
+        for component in components:
+            print(f"  {len(component)}: {', '.join(component)}")
+
+        if path:
+            source, target = (find_node(graph, name) for name in path)
+            found = shortest_path(graph, source, target)
+            if found is None:
+                print(f"\nNo link path from {source} to {target}.")
+                return 1
+            print(f"\nShortest path ({len(found) - 1} link(s)): {' -> '.join(found)}")
+        return 0
+    except Exception as err:
+        logger.error(f"Error analysing link graph: {err}", exc_info=True)
+        return 1
@@ -1,50 +1,30 @@
 import os
 import re
-import mistune
 import yaml
-from datetime import datetime
-from typing import List, Dict, Any
-from src.base_utils import setup_logger, ensure_directory, content_dir
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+from src.base_utils import setup_logger, content_dir
+from src.text_utils import (
+    slugify,
+    unique_anchor,
+    frontmatter_pattern,
+    wikilink_pattern,
+    external_link_pattern,
+    image_pattern,
+    image_size_pattern,
+    footnote_pattern,
+    footnote_ref_pattern,
+    quote_pattern,
+    author_pattern,
+    table_pattern,
+    italic_pattern,
+    bold_pattern,
+)
 
 logger = setup_logger("markdown_parser", "logs/markdown_parser.log")
 
 
-def markdown_output(md_fp: str, backlinks: Dict[str, List[str]]) -> None:
-    try:
-        logger.info(f"Logging Markdown output for: {md_fp}")
-        with open(md_fp, "r", encoding="utf-8") as f:
-            markdown_content = f.read()
-
-        try:
-            html_content = mistune.create_markdown()(markdown_content)
-        except Exception as err:
-            logger.error(f"Error converting Markdown to HTML: {err}")
-            return
-
-        md_name = os.path.splitext(os.path.basename(md_fp))[0].replace(" ", "-").lower()
-        file_backlinks = backlinks.get(md_name, [])
-
-        log_file = os.path.join("logs", "markdown_output.log")
-        ensure_directory(os.path.dirname(log_file))
-        with open(log_file, "a", encoding="utf-8") as log:
-            log.write("\n\n=== Markdown File: {} ===\n".format(md_fp))
-            log.write("=== Raw Markdown Content ===\n")
-            log.write(markdown_content)
-            log.write("\n\n=== Converted HTML Content ===\n")
-            log.write(html_content)
-            log.write("\n\n=== Backlinks ===\n")
-            if file_backlinks:
-                log.write("\n".join(file_backlinks))
-            else:
-                log.write("No backlinks found.")
-    except Exception as err:
-        logger.error(f"Error logging Markdown output for: {md_fp}: {err}")
-
-
 def parse_quotes(md_content: str) -> str:
-    quote_pattern = re.compile(r"^> (.*)", re.MULTILINE)
-    author_pattern = re.compile(r"^- (.*)", re.MULTILINE)
-
     def replace_quote(match):
         return f"<blockquote>{match.group(1)}</blockquote>"
 
@@ -58,11 +38,6 @@ def parse_quotes(md_content: str) -> str:
 
 
 def parse_tables(md_content: str) -> str:
-    table_pattern = re.compile(
-        r"^(\|(?:.*\|)+)\n(\|(?: *[-:]+[-| :]*)\|)\n((?:\|(?:.*\|)+\n?)*)",
-        re.MULTILINE,
-    )
-
     def replace_table(match):
         headers = match.group(1).strip().split("|")[1:-1]
         rows = match.group(3).strip().split("\n")
@@ -84,35 +59,32 @@ def parse_tables(md_content: str) -> str:
 
 
 def parse_italics(md_content: str) -> str:
-    italic_pattern = r"(?<!\w)_(.+?)_(?!\w)"
-    return re.sub(italic_pattern, r"<em>\1</em>", md_content)
+    return italic_pattern.sub(r"<em>\1</em>", md_content)
 
 
 def parse_bold_text(md_content: str) -> str:
-    bold_pattern = r"\*\*(.*?)\*\*"
-
     def replace_bold(match):
         bold_text = match.group(1)
         return f"<strong>{bold_text}</strong>"
 
-    return re.sub(bold_pattern, replace_bold, md_content)
+    return bold_pattern.sub(replace_bold, md_content)
 
 
 VALID_IMAGE_EXTENSIONS = (".avif", ".bmp", ".gif", ".jpeg", ".jpg", ".png", ".svg", ".webp")
 
 
-def parse_images(md_content: str, base_path: str = "../images/") -> str:
+def parse_images(
+    md_content: str, base_path: str = "../images/", assets: Optional[dict] = None, used_assets: Optional[dict] = None
+) -> str:
     """
     - `![Alt Text](image.jpg)` for standard images
     - `![Alt Text|100x200](image.jpg)` for resized image (100px width, 200px height)
     """
 
-    image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
-
     def replace_image(match):
         alt_text, src = match.groups()
 
-        resize_match = re.search(r"(.*?)\|(\d+)x(\d+)", alt_text)
+        resize_match = image_size_pattern.search(alt_text)
 
         if resize_match:
             alt_text = resize_match.group(1).strip()
@@ -125,7 +97,13 @@ def parse_images(md_content: str, base_path: str = "../images/") -> str:
         if not src.lower().endswith(VALID_IMAGE_EXTENSIONS):
             return f"<p>[Invalid image format: {src}]</p>"
 
-        image_path = os.path.join(base_path, os.path.basename(src))
+        image_name = os.path.basename(src)
+        if assets and f"images/{image_name}" in assets:
+            fingerprinted = assets[f"images/{image_name}"]
+            if used_assets is not None:
+                used_assets[f"images/{image_name}"] = fingerprinted
+            image_name = os.path.basename(fingerprinted)
+        image_path = os.path.join(base_path, image_name)
 
         return f"""
         <figure>
@@ -134,13 +112,13 @@ def parse_images(md_content: str, base_path: str = "../images/") -> str:
         </figure>
         """
 
-    return re.sub(image_pattern, replace_image, md_content)
+    return image_pattern.sub(replace_image, md_content)
 
 
 def parse_backlink(source: str, target: str, backlinks: Dict[str, List[str]]) -> None:
     try:
-        source_key = os.path.splitext(os.path.basename(source))[0].replace(" ", "-").lower()
-        target_key = target.replace(" ", "-").lower()
+        source_key = slugify(os.path.splitext(os.path.basename(source))[0])
+        target_key = slugify(target)
 
         if source_key == "index":
             if target_key not in backlinks:
@@ -158,26 +136,36 @@ def parse_backlink(source: str, target: str, backlinks: Dict[str, List[str]]) ->
         logger.error(f"Error parsing backlink from '{source}' to '{target}': {err}")
 
 
-def parse_wikilinks(source_page: str, text: str, backlinks: Dict[str, List[str]]) -> str:
-    try:
-        pattern = r"\[\[(.*?)\]\]"
+WIKILINK_FOLDERS = ("notes", "articles")
 
+
+def resolve_wikilink(link_text: str, content_dir: str = content_dir, pages: Optional[set] = None) -> Optional[str]:
+    """Returns the folder a `[[link]]` resolves into, or None."""
+    slug = slugify(link_text)
+    for folder in WIKILINK_FOLDERS:
+        if pages is not None:
+            if f"{folder}/{slug}" in pages:
+                return folder
+        elif os.path.exists(os.path.join(content_dir, folder, f"{slug}.md")):
+            return folder
+    return None
+
+
+def parse_wikilinks(
+    source_page: str, text: str, backlinks: Dict[str, List[str]], content_dir: str = content_dir
+) -> str:
+    try:
         def replace_link(match):
             link_text = match.group(1)
-            slug = link_text.replace(" ", "-").lower()
-
-            category = "articles"
-            for folder in ["notes", "articles"]:
-                if os.path.exists(os.path.join(content_dir, folder, f"{slug}.md")):
-                    category = folder
-                    break
+            slug = slugify(link_text)
+            category = resolve_wikilink(link_text, content_dir) or "articles"
 
             logger.info(f"Backlinks source: {source_page}, link text: {link_text}, resolved to category: {category}")
             parse_backlink(source_page, link_text, backlinks)
 
             return f'<a href="/{category}/{slug}.html">{link_text}</a>'
 
-        return re.sub(pattern, replace_link, text)
+        return wikilink_pattern.sub(replace_link, text)
     except Exception as err:
         logger.error(f"Error parsing wikilinks in text: {err}")
         return text
@@ -185,29 +173,35 @@ def parse_wikilinks(source_page: str, text: str, backlinks: Dict[str, List[str]]
 
 def parse_external_links(text: str) -> str:
     try:
-        pattern = r"\[(.*?)\]\((https?://.*?)\)"
-
         def replace_link(match):
             link_text = match.group(1)
             url = match.group(2)
             return f'<a href="{url}" target="_blank">{link_text}</a>'
 
-        return re.sub(pattern, replace_link, text)
+        return external_link_pattern.sub(replace_link, text)
     except Exception as err:
         logger.error(f"Error parsing external links in text: {err}")
         return text
 
 
-def parse_articles(md_content: str, page_name: str, backlinks: Dict[str, List[str]]) -> dict:
+def parse_articles(
+    md_content: str,
+    page_name: str,
+    backlinks: Dict[str, List[str]],
+    content_dir: str = content_dir,
+    assets: Optional[dict] = None,
+    used_assets: Optional[dict] = None,
+) -> dict:
     articles = []
     current_article = None
     footnotes = {}
     toc = []
+    anchors = set()
 
     try:
         processed_content, footnotes = parse_footnotes(md_content)
         processed_content = parse_quotes(processed_content)
-        processed_content = parse_images(processed_content)
+        processed_content = parse_images(processed_content, assets=assets, used_assets=used_assets)
         processed_content = parse_bold_text(processed_content)
         processed_content = parse_italics(processed_content)
         processed_content = parse_tables(processed_content)
@@ -215,7 +209,7 @@ def parse_articles(md_content: str, page_name: str, backlinks: Dict[str, List[st
         for line in processed_content.split("\n"):
             if line.startswith("## "):
                 heading_text = line[3:].strip()
-                anchor = heading_text.replace(" ", "-").lower()
+                anchor = unique_anchor(heading_text, anchors)
                 toc.append({"text": heading_text, "anchor": anchor, "level": 2})
                 line = f'<h2 id="{anchor}">{heading_text}</h2>'
 
@@ -225,7 +219,7 @@ def parse_articles(md_content: str, page_name: str, backlinks: Dict[str, List[st
 
             elif line.startswith("### "):
                 heading_text = line[4:].strip()
-                anchor = heading_text.replace(" ", "-").lower()
+                anchor = unique_anchor(heading_text, anchors)
                 toc.append({"text": heading_text, "anchor": anchor, "level": 3})
                 line = f'<h3 id="{anchor}">{heading_text}</h3>'
 
@@ -233,7 +227,7 @@ def parse_articles(md_content: str, page_name: str, backlinks: Dict[str, List[st
                     current_article["sections"].append(line)
 
             elif current_article and line.strip():
-                processed_line = parse_wikilinks(page_name, line.strip(), backlinks)
+                processed_line = parse_wikilinks(page_name, line.strip(), backlinks, content_dir)
                 processed_line = parse_external_links(processed_line)
                 current_article["sections"].append(processed_line)
 
@@ -246,41 +240,132 @@ def parse_articles(md_content: str, page_name: str, backlinks: Dict[str, List[st
     return {"articles": articles, "footnotes": footnotes, "toc": toc}
 
 
-def parse_frontmatter(md_fp: str) -> Dict[str, Any]:
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+flat_line_pattern = re.compile(r"([A-Za-z_][A-Za-z0-9_]*): +(.*?) *")
+double_quoted_pattern = re.compile(r'"([^"\\]*)"')
+single_quoted_pattern = re.compile(r"'([^']*)'")
+int_pattern = re.compile(r"[-+]?(?:0|[1-9][0-9]*)")
+float_pattern = re.compile(r"[-+]?[0-9]+\.[0-9]+")
+date_pattern = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+datetime_pattern = re.compile(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})")
+plain_pattern = re.compile(r"[A-Za-z\u00c0-\uffff][^#:\[\]{},]*")
+yaml_reserved_words = {"y", "n", "yes", "no", "true", "false", "on", "off", "null"}
+
+
+class FastPathUnsupported(ValueError):
+    pass
+
+
+def parse_flat_scalar(value: str):
+    """Resolves a scalar as SafeLoader would, or raises FastPathUnsupported."""
+    match = double_quoted_pattern.fullmatch(value) or single_quoted_pattern.fullmatch(value)
+    if match:
+        return match.group(1)
+    if int_pattern.fullmatch(value):
+        return int(value)
+    if float_pattern.fullmatch(value):
+        return float(value)
+    match = datetime_pattern.fullmatch(value)
+    if match:
+        return datetime(*(int(part) for part in match.groups()))
+    match = date_pattern.fullmatch(value)
+    if match:
+        return date(*(int(part) for part in match.groups()))
+    if plain_pattern.fullmatch(value) and value.lower() not in yaml_reserved_words:
+        return value
+    raise FastPathUnsupported(value)
+
+
+def parse_flat_yaml(text: str) -> Dict[str, Any]:
+    """Parses flat `key: value` frontmatter without YAML, or raises FastPathUnsupported."""
+    if "\r" in text:
+        raise FastPathUnsupported(text)
+
+    data = {}
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+        match = flat_line_pattern.fullmatch(line)
+        if not match:
+            raise FastPathUnsupported(line)
+
+        key, value = match.groups()
+        if key.lower() in yaml_reserved_words:
+            # YAML would load `yes:` or `null:` as a bool or None key, not a string.
+            raise FastPathUnsupported(line)
+        if value.startswith("[") and value.endswith("]"):
+            items = value[1:-1].strip()
+            data[key] = [parse_flat_scalar(item.strip()) for item in items.split(",")] if items else []
+        else:
+            data[key] = parse_flat_scalar(value)
+
+    if not data:
+        raise FastPathUnsupported(text)
+    return data
+
+
+def load_frontmatter(text: str) -> Any:
     try:
-        with open(md_fp, "r", encoding="utf-8") as f:
-            md_content = f.read()
+        return parse_flat_yaml(text)
+    except FastPathUnsupported:
+        return yaml.load(text, Loader=YamlLoader)
 
-        frontmatter_match = re.match(r"---\n(.*?)\n---\n(.*)", md_content, re.S)
-        if frontmatter_match:
-            frontmatter = yaml.safe_load(frontmatter_match.group(1))
-            content = frontmatter_match.group(2).strip()
-        else:
-            frontmatter = {}
-            content = md_content
 
-        for key in ["created", "last_modified"]:
-            if key in frontmatter and isinstance(frontmatter[key], (datetime, str)):
-                frontmatter[key] = str(frontmatter[key])
+def split_frontmatter(md_content: str) -> tuple[Dict[str, Any], str]:
+    frontmatter_match = frontmatter_pattern.match(md_content)
+    if frontmatter_match:
+        frontmatter = load_frontmatter(frontmatter_match.group(1))
+        content = frontmatter_match.group(2).strip()
+    else:
+        frontmatter = {}
+        content = md_content
+
+    for key in ["created", "last_modified"]:
+        if key in frontmatter and isinstance(frontmatter[key], (datetime, str)):
+            frontmatter[key] = str(frontmatter[key])
 
+    return frontmatter, content
+
+
+def parse_frontmatter(md_fp: str) -> Dict[str, Any]:
+    try:
+        with open(md_fp, "r", encoding="utf-8") as f:
+            frontmatter, content = split_frontmatter(f.read())
         return {"frontmatter": frontmatter, "content": content}
     except Exception as err:
         logger.error(f"Error parsing frontmatter in file {md_fp}: {err}")
         return {"frontmatter": {}, "content": ""}
 
 
+def read_frontmatter(md_fp: str) -> Dict[str, Any]:
+    """Like `parse_frontmatter`, but stops reading at the closing `---` and returns no content."""
+    try:
+        lines = []
+        with open(md_fp, "r", encoding="utf-8") as f:
+            for line in f:
+                lines.append(line)
+                if line != "---\n":
+                    if len(lines) == 1:
+                        break
+                elif len(lines) > 2:
+                    break
+        frontmatter, _ = split_frontmatter("".join(lines))
+        return {"frontmatter": frontmatter, "content": None}
+    except Exception as err:
+        logger.error(f"Error parsing frontmatter in file {md_fp}: {err}")
+        return {"frontmatter": {}, "content": None}
+
+
 def parse_footnotes(content: str):
     try:
         logger.info("Starting to extract footnotes.")
 
-        footnote_pattern = re.compile(r"\[\^(\d+)\]: (.+)")
         footnotes = {match.group(1): match.group(2) for match in footnote_pattern.finditer(content)}
         logger.info(f"Extracted footnotes: {footnotes}")
 
         content = footnote_pattern.sub("", content)
 
-        footnote_ref_pattern = re.compile(r"\[\^(\d+)\]")
-
         def replace_ref(match):
             ref_id = match.group(1)
             return f'<a href="#footnote-{ref_id}" id="ref-{ref_id}" class="footnote-ref">[^{ref_id}]</a>'
@@ -294,7 +379,7 @@ def parse_footnotes(content: str):
         return content, {}
 
 
-def parse_related(frontmatter: dict) -> list[dict]:
+def parse_related(frontmatter: dict, content_dir: str = content_dir, index: dict = None) -> list[dict]:
     try:
         related = []
         domain = frontmatter.get("domain", "")
@@ -308,6 +393,12 @@ def parse_related(frontmatter: dict) -> list[dict]:
 
         logger.info(f"Looking for related articles with Domain: {domain}.")
 
+        if index is not None:
+            matches = {page.id: page for d in domain for page in index["by_domain"].get(d, [])}
+            related = [{"title": page.title, "url": page.url} for _, page in sorted(matches.items())]
+            logger.info(f"Related articles found: {len(related)}")
+            return related
+
         for root, _, files in os.walk(content_dir):
             for file in files:
                 if file.endswith(".md"):
@@ -0,0 +1,72 @@
+import os
+import re
+import json
+import hashlib
+from src.base_utils import setup_logger, write_if_changed, cache_dir
+
+logger = setup_logger("minifier", "logs/minifier.log")
+
+MINIFY_CACHE_FILE = "minify.json"
+MINIFY_CACHE_SIZE = 5000
+
+preserved_pattern = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I)
+whitespace_pattern = re.compile(r"\s+")
+block_tag_pattern = re.compile(
+    r"\s*(</?(?:html|head|body|meta|link|title|header|nav|main|section|article|aside|footer|div|p|ul|ol|li"
+    r"|h[1-6]|table|thead|tbody|tr|th|td|figure|figcaption|blockquote|!DOCTYPE)\b[^>]*>)\s*",
+    re.I,
+)
+
+
+def minify_html(html: str) -> str:
+    """Collapses whitespace outside `<pre>`, `<textarea>`, `<script>` and `<style>`."""
+    parts = preserved_pattern.split(html)
+    minified = []
+
+    # split() yields [text, preserved block, tag name, text, ...]
+    for i in range(0, len(parts), 3):
+        text = whitespace_pattern.sub(" ", parts[i])
+        minified.append(block_tag_pattern.sub(r"\1", text))
+        if i + 1 < len(parts):
+            minified.append(parts[i + 1])
+
+    return "".join(minified).strip()
+
+
+def load_minify_cache(cache_dir: str = cache_dir) -> dict:
+    cache_fp = os.path.join(cache_dir, MINIFY_CACHE_FILE)
+    try:
+        with open(cache_fp, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        saved = {}
+    except Exception as err:
+        logger.error(f"Error loading minify cache {cache_fp}: {err}")
+        saved = {}
+    if not isinstance(saved.get("entries"), dict):
+        saved = {}
+    return {"build": saved.get("build", 0) + 1, "entries": saved.get("entries", {}), "used": False}
+
+
+def minify_cached(html: str, cache: dict) -> str:
+    digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    entry = cache["entries"].get(digest)
+    minified = entry[1] if entry else minify_html(html)
+    cache["entries"][digest] = [cache["build"], minified]
+    cache["used"] = True
+    return minified
+
+
+def save_minify_cache(cache: dict, cache_dir: str = cache_dir) -> None:
+    """Saves the cache, dropping the least recently used entries past `MINIFY_CACHE_SIZE`."""
+    if not cache["used"]:
+        return
+    cache_fp = os.path.join(cache_dir, MINIFY_CACHE_FILE)
+    try:
+        entries = cache["entries"]
+        if len(entries) > MINIFY_CACHE_SIZE:
+            recent = sorted(entries, key=lambda digest: entries[digest][0], reverse=True)[:MINIFY_CACHE_SIZE]
+            entries = {digest: entries[digest] for digest in recent}
+        write_if_changed(cache_fp, json.dumps({"build": cache["build"], "entries": entries}, separators=(",", ":")))
+    except Exception as err:
+        logger.error(f"Error saving minify cache {cache_fp}: {err}")
@@ -0,0 +1,137 @@
+import os
+import re
+import json
+import html
+from collections import defaultdict
+from src.base_utils import setup_logger, write_if_changed, cache_dir, public_dir
+from src.bulk_io import queue_write
+
+logger = setup_logger("search_index", "logs/search_index.log")
+
+SEARCH_INDEX_VERSION = 1
+SEARCH_CACHE_FILE = "search_pages.json"
+SEARCH_INDEX_FILE = "search.json"
+
+tag_pattern = re.compile(r"<[^>]+>")
+token_pattern = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    text = html.unescape(tag_pattern.sub(" ", text))
+    return [token.lower() for token in token_pattern.findall(text)]
+
+
+def load_search_cache(cache_dir: str = cache_dir) -> dict:
+    cache_fp = os.path.join(cache_dir, SEARCH_CACHE_FILE)
+    try:
+        with open(cache_fp, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == SEARCH_INDEX_VERSION:
+            return cache
+        logger.info("Search cache version changed, starting from an empty cache.")
+    except FileNotFoundError:
+        logger.info("No search cache found, starting from an empty cache.")
+    except Exception as err:
+        logger.error(f"Error loading search cache {cache_fp}: {err}")
+    return {"version": SEARCH_INDEX_VERSION, "pages": {}}
+
+
+def update_search_entry(cache: dict, page_key: str, url: str, title: str, articles: list[dict]) -> None:
+    try:
+        tokens = tokenize(title)
+        for article in articles:
+            tokens.extend(tokenize(article.get("header", "")))
+            for section in article.get("sections", []):
+                tokens.extend(tokenize(section))
+
+        terms = defaultdict(list)
+        for position, token in enumerate(tokens):
+            terms[token].append(position)
+
+        cache["pages"][page_key] = {"url": url, "title": title, "terms": dict(terms)}
+    except Exception as err:
+        logger.error(f"Error indexing page {page_key}: {err}")
+
+
+def build_search_index(cache: dict) -> dict:
+    pages = []
+    postings = defaultdict(list)
+
+    for page_id, page_key in enumerate(sorted(cache["pages"])):
+        entry = cache["pages"][page_key]
+        pages.append([entry["url"], entry["title"]])
+        for term, positions in entry["terms"].items():
+            postings[term].append([page_id, positions])
+
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "pages": pages,
+        "terms": {term: postings[term] for term in sorted(postings)},
+    }
+
+
+def write_search_index(
+    cache: dict, content_dir: str, public_dir: str = public_dir, cache_dir: str = cache_dir, writer=None
+) -> None:
+    index_fp = os.path.join(public_dir, SEARCH_INDEX_FILE)
+    try:
+        for page_key in list(cache["pages"]):
+            if not os.path.exists(os.path.join(content_dir, page_key)):
+                del cache["pages"][page_key]
+                logger.info(f"Dropped deleted page from search index: {page_key}")
+
+        write_if_changed(os.path.join(cache_dir, SEARCH_CACHE_FILE), json.dumps(cache, separators=(",", ":")))
+
+        serialized = json.dumps(build_search_index(cache), separators=(",", ":"), ensure_ascii=False)
+        queue_write(writer, index_fp, serialized, f"Wrote search index with {len(cache['pages'])} page(s): {index_fp}")
+    except Exception as err:
+        logger.error(f"Error writing search index: {err}", exc_info=True)
+
+
+def search(query: str, public_dir: str = public_dir, limit: int = 10) -> list[dict]:
+    """Pages containing every term of `query`, best first; a quoted query matches a phrase."""
+    index_fp = os.path.join(public_dir, SEARCH_INDEX_FILE)
+    try:
+        with open(index_fp, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        logger.error(f"Search index not found: {index_fp}. Run `generate` first.")
+        return []
+
+    query = query.strip()
+    phrase = len(query) > 1 and query.startswith('"') and query.endswith('"')
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    matches = None
+    for term in terms:
+        term_postings = {page_id: positions for page_id, positions in index["terms"].get(term, [])}
+        if matches is None:
+            matches = {page_id: [positions] for page_id, positions in term_postings.items()}
+        else:
+            matches = {
+                page_id: found + [term_postings[page_id]]
+                for page_id, found in matches.items()
+                if page_id in term_postings
+            }
+        if not matches:
+            return []
+
+    results = []
+    for page_id, positions in matches.items():
+        if phrase:
+            starts = set(positions[0])
+            for offset, term_positions in enumerate(positions[1:], start=1):
+                starts &= {position - offset for position in term_positions}
+            if not starts:
+                continue
+            score = len(starts) * len(terms)
+        else:
+            score = sum(len(term_positions) for term_positions in positions)
+
+        url, title = index["pages"][page_id]
+        results.append({"title": title, "url": url, "score": score})
+
+    results.sort(key=lambda x: (-x["score"], x["title"]))
+    return results[:limit]
@@ -1,28 +1,131 @@
 import os
+import json
 import shutil
+import fnmatch
+import hashlib
 from datetime import datetime
 from typing import Optional
-from src.base_utils import setup_logger, ensure_directory, snapshots_dir, public_dir
+from src.base_utils import setup_logger, ensure_directory, write_if_changed, snapshots_dir, public_dir
+from src.bulk_io import open_writer, submit, close_writer
 
 logger = setup_logger("snapshot_manager", "logs/snapshot_manager.log")
 
+MANIFESTS_DIR = "manifests"
+
+
+def file_digest(fp: str) -> str:
+    digest = hashlib.sha256()
+    with open(fp, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_entry(fp: str) -> dict:
+    stat = os.stat(fp)
+    return {"sha256": file_digest(fp), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def manifest_path(snapshot_id: str, snapshots_dir: str = snapshots_dir) -> str:
+    return os.path.join(snapshots_dir, MANIFESTS_DIR, f"{snapshot_id}.json")
+
+
+def list_snapshot_ids(snapshots_dir: str = snapshots_dir) -> list[str]:
+    manifests_dir = os.path.join(snapshots_dir, MANIFESTS_DIR)
+    if not os.path.isdir(manifests_dir):
+        return []
+    return sorted(os.path.splitext(file)[0] for file in os.listdir(manifests_dir) if file.endswith(".json"))
+
+
+def load_snapshot_manifest(snapshot_id: str, snapshots_dir: str = snapshots_dir) -> Optional[dict]:
+    manifest_fp = manifest_path(snapshot_id, snapshots_dir)
+    try:
+        with open(manifest_fp, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        available = ", ".join(list_snapshot_ids(snapshots_dir)) or "none"
+        logger.error(f"Snapshot `{snapshot_id}` has no manifest (available: {available}).")
+    except Exception as err:
+        logger.error(f"Error loading snapshot manifest {manifest_fp}: {err}")
+    return None
+
+
+def save_snapshot_manifest(
+    snapshot_id: str, files: dict, snapshots_dir: str = snapshots_dir, category: Optional[str] = None
+) -> None:
+    """Records each file's copy, hash, size and mtime for diffs and restores."""
+    manifest_fp = manifest_path(snapshot_id, snapshots_dir)
+    try:
+        manifest = {"id": snapshot_id, "category": category, "files": files}
+        write_if_changed(manifest_fp, json.dumps(manifest, indent=1, sort_keys=True))
+        logger.info(f"Snapshot manifest written: {manifest_fp} ({len(files)} file(s))")
+    except Exception as err:
+        logger.error(f"Error writing snapshot manifest {manifest_fp}: {err}")
+
+
+def missing_copies(snapshot_id: str, files: dict, snapshots_dir: str = snapshots_dir, report: bool = True) -> list[str]:
+    """Returns, and with `report` prints, the files whose snapshot copy is gone."""
+    missing = sorted(
+        rel_fp for rel_fp, entry in files.items() if not os.path.exists(os.path.join(snapshots_dir, entry["snapshot"]))
+    )
+    if report and missing:
+        for rel_fp in missing:
+            print(f"! {rel_fp} (copy missing from snapshot {snapshot_id})")
+        logger.warning(f"Snapshot {snapshot_id} is missing {len(missing)} copied file(s).")
+    return missing
+
+
+def prune_snapshot_manifests(snapshots_dir: str = snapshots_dir) -> None:
+    """Drops deleted copies from manifests and removes manifests left empty."""
+    for snapshot_id in list_snapshot_ids(snapshots_dir):
+        manifest = load_snapshot_manifest(snapshot_id, snapshots_dir)
+        if manifest is None:
+            continue
+        missing = set(missing_copies(snapshot_id, manifest["files"], snapshots_dir, report=False))
+        files = {rel_fp: entry for rel_fp, entry in manifest["files"].items() if rel_fp not in missing}
+        if len(files) == len(manifest["files"]):
+            continue
+        if files:
+            save_snapshot_manifest(snapshot_id, files, snapshots_dir, manifest.get("category"))
+        else:
+            os.remove(manifest_path(snapshot_id, snapshots_dir))
+            logger.info(f"Deleted snapshot manifest: {snapshot_id}")
+
+
+def copy_snapshot_file(source_fp: str, snapshot_fp: str) -> dict:
+    shutil.copy2(source_fp, snapshot_fp)
+    return file_entry(source_fp)
+
+
+def snapshot_files(public_dir: str, snapshots_dir: str, rel_fps: list[str], timestamp: str) -> dict:
+    snapshot_rel_fps = [f"{os.path.splitext(rel_fp)[0]}_{timestamp}.html" for rel_fp in rel_fps]
+    writer = open_writer(os.path.dirname(os.path.join(snapshots_dir, fp)) for fp in snapshot_rel_fps)
+    for rel_fp, snapshot_rel_fp in zip(rel_fps, snapshot_rel_fps):
+        snapshot_fp = os.path.join(snapshots_dir, snapshot_rel_fp)
+        message = f"Snapshot created: {rel_fp} -> {snapshot_fp}"
+        submit(writer, snapshot_fp, copy_snapshot_file, os.path.join(public_dir, rel_fp), snapshot_fp, message=message)
+
+    files = {}
+    for rel_fp, snapshot_rel_fp, entry in zip(rel_fps, snapshot_rel_fps, close_writer(writer)):
+        if entry is not None:
+            files[rel_fp.replace(os.sep, "/")] = {"snapshot": snapshot_rel_fp.replace(os.sep, "/"), **entry}
+    return files
+
+
+def list_html_files(public_dir: str, search_dir: str) -> list[str]:
+    return [
+        os.path.relpath(os.path.join(root, file), public_dir)
+        for root, _, files in os.walk(search_dir)
+        for file in files
+        if file.endswith(".html")
+    ]
+
 
 def snapshot_site(public_dir: str, snapshots_dir: str = snapshots_dir) -> None:
     try:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        for root, _, files in os.walk(public_dir):
-            for file in files:
-                if file.endswith(".html"):
-                    rel_fp = os.path.relpath(os.path.join(root, file), public_dir)
-                    snapshot_fp = os.path.join(snapshots_dir, rel_fp)
-                    snapshot_dir = os.path.dirname(snapshot_fp)
-                    ensure_directory(snapshot_dir)
-                    snapshot_file = f"{os.path.splitext(file)[0]}_{timestamp}.html"
-                    shutil.copy2(
-                        os.path.join(root, file),
-                        os.path.join(snapshot_dir, snapshot_file),
-                    )
-                    logger.info(f"Snapshot created: {rel_fp} -> {os.path.join(snapshot_dir, snapshot_file)}")
+        files = snapshot_files(public_dir, snapshots_dir, list_html_files(public_dir, public_dir), timestamp)
+        save_snapshot_manifest(timestamp, files, snapshots_dir)
     except Exception as err:
         logger.error(f"Error creating site snapshot: {err}")
 
@@ -35,29 +138,133 @@ def snapshot_category(public_dir: str, snapshots_dir: str, category: str) -> Non
             logger.error(f"Category `{category}` does not exist in the public directory.")
             return
 
-        category_snapshot_dir = os.path.join(snapshots_dir, category)
-        ensure_directory(category_snapshot_dir)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        snapshot_count = 0
-
-        for root, _, files in os.walk(category_dir):
-            for file in files:
-                if file.endswith(".html"):
-                    rel_fp = os.path.relpath(os.path.join(root, file), category_dir)
-                    snapshot_fp = os.path.join(category_snapshot_dir, f"{rel_fp}_{timestamp}.html")
-                    ensure_directory(os.path.dirname(snapshot_fp))
-                    shutil.copy2(os.path.join(root, file), snapshot_fp)
-                    logger.info(f"Snapshot created: {rel_fp} -> {snapshot_fp}")
-                    snapshot_count += 1
-
-        if snapshot_count == 0:
+        files = snapshot_files(public_dir, snapshots_dir, list_html_files(public_dir, category_dir), timestamp)
+
+        if not files:
             logger.warning(f"No HTML files found for category `{category}`.")
         else:
-            logger.info(f"Snapshot created for {snapshot_count} file(s) in category `{category}`.")
+            save_snapshot_manifest(timestamp, files, snapshots_dir, category)
+            logger.info(f"Snapshot created for {len(files)} file(s) in category `{category}`.")
     except Exception as err:
         logger.error(f"Error creating snapshot for category `{category}`: {err}")
 
 
+def matches_current(public_dir: str, rel_fp: str, entry: dict) -> bool:
+    """Whether a file matches its manifest entry, hashing only when the size matches but mtime doesn't."""
+    current_fp = os.path.join(public_dir, rel_fp)
+    try:
+        stat = os.stat(current_fp)
+    except FileNotFoundError:
+        return False
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    return file_digest(current_fp) == entry["sha256"]
+
+
+def matches_filter(rel_fp: str, category: Optional[str] = None, pattern: Optional[str] = None) -> bool:
+    if category and not rel_fp.startswith(f"{category}/"):
+        return False
+    return not pattern or fnmatch.fnmatch(rel_fp, pattern)
+
+
+def diff_snapshots(
+    snapshot_id: str,
+    other_id: Optional[str] = None,
+    category: Optional[str] = None,
+    pattern: Optional[str] = None,
+    public_dir: str = public_dir,
+    snapshots_dir: str = snapshots_dir,
+) -> Optional[dict]:
+    """Prints `A`/`M`/`D` lines between a snapshot and another snapshot or `public/`."""
+    try:
+        manifest = load_snapshot_manifest(snapshot_id, snapshots_dir)
+        if manifest is None:
+            return None
+        old_files = {fp: entry for fp, entry in manifest["files"].items() if matches_filter(fp, category, pattern)}
+        missing_copies(snapshot_id, old_files, snapshots_dir)
+
+        if other_id:
+            other = load_snapshot_manifest(other_id, snapshots_dir)
+            if other is None:
+                return None
+            new_files = {fp: entry for fp, entry in other["files"].items() if matches_filter(fp, category, pattern)}
+            missing_copies(other_id, new_files, snapshots_dir)
+            modified = sorted(
+                fp for fp in old_files.keys() & new_files.keys() if old_files[fp]["sha256"] != new_files[fp]["sha256"]
+            )
+        else:
+            scope = category or manifest.get("category")
+            search_dir = os.path.join(public_dir, scope) if scope else public_dir
+            new_files = {
+                fp.replace(os.sep, "/")
+                for fp in list_html_files(public_dir, search_dir)
+                if matches_filter(fp.replace(os.sep, "/"), category, pattern)
+            }
+            modified = sorted(
+                fp for fp in old_files.keys() & new_files if not matches_current(public_dir, fp, old_files[fp])
+            )
+
+        changes = {
+            "added": sorted(new_files - old_files.keys()),
+            "modified": modified,
+            "deleted": sorted(old_files.keys() - new_files),
+        }
+
+        target = other_id or public_dir
+        for status, key in (("A", "added"), ("M", "modified"), ("D", "deleted")):
+            for fp in changes[key]:
+                print(f"{status} {fp}")
+        logger.info(
+            f"Diff {snapshot_id} -> {target}: {len(changes['added'])} added, "
+            f"{len(changes['modified'])} modified, {len(changes['deleted'])} deleted."
+        )
+        return changes
+    except Exception as err:
+        logger.error(f"Error diffing snapshot `{snapshot_id}`: {err}", exc_info=True)
+        return None
+
+
+def restore_snapshot(
+    snapshot_id: str,
+    category: Optional[str] = None,
+    pattern: Optional[str] = None,
+    public_dir: str = public_dir,
+    snapshots_dir: str = snapshots_dir,
+) -> Optional[int]:
+    """Restores the changed files of a snapshot; returns the count, or None when it can't be read."""
+    try:
+        manifest = load_snapshot_manifest(snapshot_id, snapshots_dir)
+        if manifest is None:
+            return None
+
+        selected = {
+            rel_fp: entry for rel_fp, entry in manifest["files"].items() if matches_filter(rel_fp, category, pattern)
+        }
+        missing = set(missing_copies(snapshot_id, selected, snapshots_dir))
+        changed = [
+            (rel_fp, entry)
+            for rel_fp, entry in sorted(selected.items())
+            if rel_fp not in missing and not matches_current(public_dir, rel_fp, entry)
+        ]
+        writer = open_writer(os.path.dirname(os.path.join(public_dir, rel_fp)) for rel_fp, _ in changed)
+        for rel_fp, entry in changed:
+            snapshot_fp = os.path.join(snapshots_dir, entry["snapshot"])
+            restore_fp = os.path.join(public_dir, rel_fp)
+            message = f"Restored: {snapshot_fp} -> {restore_fp}"
+            submit(writer, restore_fp, shutil.copy2, snapshot_fp, restore_fp, message=message)
+        restored_files = sum(result is not None for result in close_writer(writer))
+
+        print(f"Restored {restored_files} file(s) from snapshot {snapshot_id}.")
+        logger.info(f"Restored {restored_files} file(s) from snapshot {snapshot_id}.")
+        return restored_files
+    except Exception as err:
+        logger.error(f"Error restoring snapshot `{snapshot_id}`: {err}", exc_info=True)
+        return None
+
+
 def restore_site(category: Optional[str] = None, snapshot: Optional[str] = None) -> None:
     try:
         source_dir = os.path.join(snapshots_dir, category) if category else snapshots_dir
@@ -174,6 +381,7 @@ def cleanup_snapshots(snapshots_dir: str = snapshots_dir) -> None:
                     logger.info(f"Deleted snapshot: {snapshot}")
                 except Exception as err:
                     logger.error(f"Error deleting snapshot `{snapshot}`: {err}")
+            prune_snapshot_manifests(snapshots_dir)
             print("All snapshots have been deleted.")
         else:
             try:
@@ -202,20 +410,34 @@ def cleanup_snapshots(snapshots_dir: str = snapshots_dir) -> None:
                     logger.info(f"Deleted snapshot: {snapshot}")
                 except Exception as err:
                     logger.error(f"Error deleting snapshot `{snapshot}`: {err}")
+            prune_snapshot_manifests(snapshots_dir)
             print(f"{len(selected_snapshots)} snapshots have been deleted.")
     except Exception as err:
         logger.error(f"Error during snapshot deletion: {err}", exc_info=True)
 
 
-def manage_snapshots(action: str, category: Optional[str] = None) -> None:
+def manage_snapshots(
+    action: str,
+    category: Optional[str] = None,
+    snapshot: Optional[str] = None,
+    other: Optional[str] = None,
+    pattern: Optional[str] = None,
+) -> int:
+    """Runs a snapshot action and returns the exit code."""
     if action == "create":
         if category:
             snapshot_category(public_dir, snapshots_dir, category)
         else:
             snapshot_site(public_dir, snapshots_dir)
     elif action == "restore":
+        if snapshot:
+            return 0 if restore_snapshot(snapshot, category, pattern) is not None else 1
         restore_site(category=category)
+    elif action == "diff":
+        return 0 if diff_snapshots(snapshot, other, category, pattern) is not None else 1
     elif action == "delete":
         cleanup_snapshots(snapshots_dir)
     else:
         logger.error(f"Unknown snapshot action: {action}")
+        return 1
+    return 0
@@ -0,0 +1,74 @@
+import os
+import shutil
+from src.base_utils import setup_logger, ensure_directory, is_temporary
+
+logger = setup_logger("staging", "logs/staging.log")
+
+
+def staging_dirs(public_dir: str) -> tuple[str, str]:
+    public_dir = os.path.normpath(public_dir)
+    return f"{public_dir}.staging", f"{public_dir}.old"
+
+
+def recover_public(public_dir: str) -> None:
+    """Finishes or undoes an interrupted `swap_in`."""
+    _, old_dir = staging_dirs(public_dir)
+    if not os.path.isdir(old_dir):
+        return
+    if os.path.exists(public_dir):
+        shutil.rmtree(old_dir, ignore_errors=True)
+        logger.info(f"Removed leftover previous output: {old_dir}")
+    else:
+        os.replace(old_dir, public_dir)
+        logger.warning(f"Restored {public_dir} from an interrupted swap.")
+
+
+def clone_tree(src_dir: str, dest_dir: str) -> int:
+    """Mirrors `src_dir` into `dest_dir` with hard links, copying where linking fails."""
+    linked = 0
+    for root, _, files in os.walk(src_dir):
+        target_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        ensure_directory(target_root)
+        for file in files:
+            src_fp = os.path.join(root, file)
+            dest_fp = os.path.join(target_root, file)
+            try:
+                os.link(src_fp, dest_fp)
+            except OSError:
+                shutil.copy2(src_fp, dest_fp)
+            linked += 1
+    return linked
+
+
+def sweep_temporary(directory: str) -> int:
+    removed = 0
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if is_temporary(file):
+                os.remove(os.path.join(root, file))
+                removed += 1
+    return removed
+
+
+def prepare_staging(public_dir: str) -> tuple[str, bool]:
+    """Returns the staging directory and whether it resumes an interrupted build."""
+    staging_dir, _ = staging_dirs(public_dir)
+    if os.path.isdir(staging_dir):
+        removed = sweep_temporary(staging_dir)
+        logger.info(f"Resuming interrupted build in {staging_dir} ({removed} temporary file(s) removed)")
+        return staging_dir, True
+
+    ensure_directory(staging_dir)
+    linked = clone_tree(public_dir, staging_dir) if os.path.isdir(public_dir) else 0
+    logger.info(f"Staging build in {staging_dir} ({linked} file(s) linked from {public_dir})")
+    return staging_dir, False
+
+
+def swap_in(staging_dir: str, public_dir: str) -> None:
+    """Replaces `public_dir` with the finished staging directory."""
+    _, old_dir = staging_dirs(public_dir)
+    if os.path.exists(public_dir):
+        os.replace(public_dir, old_dir)
+    os.replace(staging_dir, public_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    logger.info(f"Swapped staged build into {public_dir}")
@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Optional
+from jinja2 import Environment, FileSystemLoader, meta, pass_context
+from src.base_utils import setup_logger, write_if_changed, cache_dir
+
+logger = setup_logger("template_loader", "logs/template_loader.log")
+
+RENDER_MANIFEST_FILE = "render_manifest.json"
+RENDER_JOURNAL_FILE = "render_journal.jsonl"
+
+environments = {}
+environments_lock = threading.Lock()
+
+
+class DependencyTrackingLoader(FileSystemLoader):
+    """A FileSystemLoader that records each template's digest and references."""
+
+    def __init__(self, searchpath, **kwargs):
+        super().__init__(searchpath, **kwargs)
+        self.digests = {}
+        self.references = {}
+
+    def get_source(self, environment: Environment, template: str):
+        source, filename, uptodate = super().get_source(environment, template)
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        references = {name for name in meta.find_referenced_templates(environment.parse(source)) if name is not None}
+        with environments_lock:
+            self.digests[template] = digest
+            self.references[template] = references
+        return source, filename, uptodate
+
+
+@pass_context
+def asset(context, path: str) -> str:
+    """Maps an asset path to its fingerprinted name and notes it in `used_assets`."""
+    fingerprinted = context.get("assets", {}).get(path, path)
+    used_assets = context.get("used_assets")
+    if used_assets is not None:
+        used_assets[path] = fingerprinted
+    return fingerprinted
+
+
+def get_environment(templates_dir: str) -> Environment:
+    templates_dir = os.path.abspath(templates_dir)
+    with environments_lock:
+        if templates_dir not in environments:
+            environment = Environment(loader=DependencyTrackingLoader(templates_dir))
+            environment.globals["asset"] = asset
+            environments[templates_dir] = environment
+        return environments[templates_dir]
+
+
+def template_dependencies(environment: Environment, template_name: str) -> dict:
+    """Returns `{template: digest}` for a template and everything it pulls in."""
+    loader = environment.loader
+    dependencies = {}
+    pending = [template_name]
+
+    while pending:
+        name = pending.pop()
+        if name in dependencies:
+            continue
+        with environments_lock:
+            loaded = name in loader.digests
+        # Loading takes the lock itself, so it happens outside it.
+        if not loaded:
+            environment.get_template(name)
+        with environments_lock:
+            dependencies[name] = loader.digests[name]
+            pending.extend(loader.references[name])
+
+    return dependencies
+
+
+def load_render_manifest(cache_dir: str = cache_dir) -> dict:
+    manifest_fp = os.path.join(cache_dir, RENDER_MANIFEST_FILE)
+    try:
+        with open(manifest_fp, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as err:
+        logger.error(f"Error loading render manifest {manifest_fp}: {err}")
+        return {}
+
+
+def render_key(template_name: str, dependencies: dict, context: dict, options: dict) -> dict:
+    serialized_context = json.dumps(context, sort_keys=True, default=str)
+    return {
+        "template": template_name,
+        "dependencies": dependencies,
+        "context": hashlib.sha256(serialized_context.encode("utf-8")).hexdigest(),
+        "options": options,
+    }
+
+
+def is_up_to_date(entry: Optional[dict], key: dict, assets: dict) -> bool:
+    """True when `entry` was rendered from `key` and its assets kept their fingerprints."""
+    if not entry or "output" not in entry:
+        return False
+    used_assets = entry.get("assets", {})
+    return {name: value for name, value in entry.items() if name not in ("assets", "output")} == key and all(
+        assets.get(path, path) == fingerprinted for path, fingerprinted in used_assets.items()
+    )
+
+
+def save_render_manifest(manifest: dict, public_dir: str, cache_dir: str = cache_dir) -> None:
+    """
+    Writes the manifest, dropping entries whose output no longer exists.
+    """
+    manifest_fp = os.path.join(cache_dir, RENDER_MANIFEST_FILE)
+    try:
+        manifest = {
+            output: entry for output, entry in manifest.items() if os.path.exists(os.path.join(public_dir, output))
+        }
+        write_if_changed(manifest_fp, json.dumps(manifest, indent=1, sort_keys=True))
+    except Exception as err:
+        logger.error(f"Error saving render manifest {manifest_fp}: {err}")
+
+
+def open_render_journal(manifest: dict, resume: bool, cache_dir: str = cache_dir) -> dict:
+    """Opens the render journal, merging an interrupted build's entries into `manifest` on resume."""
+    journal_fp = os.path.join(cache_dir, RENDER_JOURNAL_FILE)
+    if resume:
+        try:
+            with open(journal_fp, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        manifest.update(json.loads(line))
+                    except ValueError:
+                        # The last line may have been cut off when the build was killed.
+                        continue
+            logger.info(f"Loaded render journal {journal_fp}")
+        except FileNotFoundError:
+            pass
+
+    os.makedirs(cache_dir, exist_ok=True)
+    journal_file = open(journal_fp, "a" if resume else "w", encoding="utf-8")
+    return {"path": journal_fp, "file": journal_file, "lock": threading.Lock()}
+
+
+def record_render(journal: dict, output: str, key: dict) -> None:
+    line = json.dumps({output: key}, sort_keys=True, separators=(",", ":"))
+    with journal["lock"]:
+        journal["file"].write(line + "\n")
+        journal["file"].flush()
+
+
+def close_render_journal(journal: dict, remove: bool = False) -> None:
+    journal["file"].close()
+    if remove:
+        os.remove(journal["path"])
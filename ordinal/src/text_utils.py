@@ -0,0 +1,39 @@
+import re
+from functools import lru_cache
+
+# Patterns shared by the parser, the content index and the link checker, compiled once
+# at import instead of on every call.
+frontmatter_pattern = re.compile(r"---\n(.*?)\n---\n(.*)", re.S)
+last_modified_pattern = re.compile(r"^last_modified:.*$", re.M)
+wikilink_pattern = re.compile(r"\[\[(.*?)\]\]")
+external_link_pattern = re.compile(r"\[(.*?)\]\((https?://.*?)\)")
+image_pattern = re.compile(r"!\[(.*?)\]\((.*?)\)")
+image_size_pattern = re.compile(r"(.*?)\|(\d+)x(\d+)")
+footnote_pattern = re.compile(r"\[\^(\d+)\]: (.+)")
+footnote_ref_pattern = re.compile(r"\[\^(\d+)\]")
+quote_pattern = re.compile(r"^> (.*)", re.MULTILINE)
+author_pattern = re.compile(r"^- (.*)", re.MULTILINE)
+table_pattern = re.compile(
+    r"^(\|(?:.*\|)+)\n(\|(?: *[-:]+[-| :]*)\|)\n((?:\|(?:.*\|)+\n?)*)",
+    re.MULTILINE,
+)
+italic_pattern = re.compile(r"(?<!\w)_(.+?)_(?!\w)")
+bold_pattern = re.compile(r"\*\*(.*?)\*\*")
+
+
+@lru_cache(maxsize=4096)
+def slugify(text: str) -> str:
+    """`Source Engine 2` -> `source-engine-2`"""
+    return text.replace(" ", "-").lower()
+
+
+def unique_anchor(text: str, seen: set) -> str:
+    """Returns a page-unique anchor, suffixing `-1`, `-2`, ... on repeats."""
+    anchor = slugify(text)
+    candidate = anchor
+    suffix = 0
+    while candidate in seen:
+        suffix += 1
+        candidate = f"{anchor}-{suffix}"
+    seen.add(candidate)
+    return candidate